@@ -1 +1,2 @@
 from .debugger import Debugger
+from .model import CapturePolicy
\ No newline at end of file
@@ -4,6 +4,7 @@ from qiskit.providers.backend import Backend
 from qiskit.transpiler.basepasses import AnalysisPass, TransformationPass
 
 from typing import Optional, Union
+import atexit
 import logging
 import warnings
 
@@ -12,17 +13,39 @@ from IPython.display import display
 from qiskit_trebugger.model import TranspilerLoggingHandler
 from qiskit_trebugger.model import TranspilerDataCollector
 from qiskit_trebugger.model import TranspilationSequence
+from qiskit_trebugger.model import SnapshotStore
+from qiskit_trebugger.model import DiskSnapshotStore
+from qiskit_trebugger.model import CompressedSnapshotStore
+from qiskit_trebugger.model import CapturePolicy
 from qiskit_trebugger.views.widget.timeline_view import TimelineView
+from qiskit_trebugger.views.widget.render_cache import RenderCache
+from qiskit_trebugger.views.widget.step_batcher import StepBatcher
+from qiskit_trebugger.views.widget.circuit_canvas import CircuitCanvas
+from qiskit_trebugger.views.widget.property_table import FrontendPropertyTable
+from qiskit_trebugger.views.widget.circuit_renderer import (
+    InlineRenderer,
+    ProcessRenderer,
+)
 from .debugger_error import DebuggerError
 
 
 class Debugger:
+    _process_renderer = None
+
     @classmethod
     def debug(
         cls,
         circuit: QuantumCircuit,
         backend: Optional[Union[Backend, BaseBackend]] = None,
         optimization_level: Optional[int] = None,
+        keyframe_interval: int = 1,
+        async_collection: bool = False,
+        capture_policy: Optional[CapturePolicy] = None,
+        snapshot_backend: str = "memory",
+        render_cache_dir: Optional[str] = None,
+        render_backend: str = "inline",
+        circuit_view: str = "image",
+        property_view: str = "widgets",
         **kwargs
     ):
 
@@ -33,12 +56,41 @@ class Debugger:
 
         # Create the view:
         view = TimelineView()
+        if render_cache_dir is not None:
+            # keep rendered circuit images on disk, across sessions
+            view.render_cache = RenderCache(
+                TimelineView.RENDER_CACHE_SIZE, cache_dir=render_cache_dir
+            )
+        view.renderer = Debugger._get_renderer(render_backend)
+        if circuit_view == "canvas":
+            # circuits are drawn in the browser by the canvas widget, which
+            # needs the classic notebook; elsewhere the view keeps images
+            CircuitCanvas.load_frontend()
+        elif circuit_view != "image":
+            raise DebuggerError("Unknown circuit view: " + str(circuit_view))
+        view.circuit_view = circuit_view
+        if property_view == "frontend":
+            # property sets are shown by a front-end module of the classic
+            # notebook
+            FrontendPropertyTable.load_frontend()
+        elif property_view != "widgets":
+            raise DebuggerError("Unknown property view: " + str(property_view))
+        view.property_view = property_view
+
+        # steps reach the view in batches, not one front-end update per pass
+        step_batcher = StepBatcher(view.add_steps)
 
         def on_step_callback(step):
-            view.add_step(step)
+            step_batcher.add(step)
 
         # Prepare the model:
-        transpilation_sequence = TranspilationSequence(on_step_callback)
+        if capture_policy is None:
+            capture_policy = CapturePolicy()
+
+        snapshots = Debugger._get_snapshot_store(
+            snapshot_backend, keyframe_interval, capture_policy
+        )
+        transpilation_sequence = TranspilationSequence(on_step_callback, snapshots)
 
         warnings.simplefilter("ignore")
         transpilation_sequence.general_info = {
@@ -53,7 +105,9 @@ class Debugger:
         warnings.simplefilter("default")
 
         Debugger._register_logging_handler(transpilation_sequence)
-        transpiler_callback = Debugger._get_data_collector(transpilation_sequence)
+        data_collector = Debugger._get_data_collector(
+            transpilation_sequence, async_collection, capture_policy
+        )
 
         # Pass the model to the view:
         view.transpilation_sequence = transpilation_sequence
@@ -61,17 +115,36 @@ class Debugger:
 
         display(view)
 
-        transpile(
-            circuit,
-            backend,
-            optimization_level=optimization_level,
-            callback=transpiler_callback,
-            **kwargs
-        )
+        try:
+            transpile(
+                circuit,
+                backend,
+                optimization_level=optimization_level,
+                callback=data_collector.transpiler_callback,
+                **kwargs
+            )
+        finally:
+            # wait for the steps still queued by an asynchronous collector,
+            # then show the last batch, also when the transpilation failed:
+            try:
+                data_collector.close()
+            finally:
+                step_batcher.flush()
 
         view.update_summary()
         view.add_class("done")
 
+    @classmethod
+    def close(cls):
+        """Shuts down the rendering processes shared by the debugging sessions.
+
+        They are started again by the next session rendering in processes,
+        views of the previous sessions can not render anymore.
+        """
+        if cls._process_renderer is not None:
+            cls._process_renderer.shutdown()
+            cls._process_renderer = None
+
     @classmethod
     def _register_logging_handler(cls, transpilation_sequence):
 
@@ -100,5 +173,49 @@ class Debugger:
         logger.addHandler(handler)
 
     @classmethod
-    def _get_data_collector(cls, transpilation_sequence):
-        return TranspilerDataCollector(transpilation_sequence).transpiler_callback
+    def _get_snapshot_store(cls, snapshot_backend, keyframe_interval, capture_policy):
+        if snapshot_backend == "memory":
+            # Every `keyframe_interval`-th circuit snapshot is stored in full,
+            # the ones in between as edits to their predecessor:
+            return SnapshotStore(
+                keyframe_interval=keyframe_interval,
+                memory_budget=capture_policy.memory_budget,
+            )
+        elif keyframe_interval != 1 and snapshot_backend in ("disk", "zlib", "lzma"):
+            # only the memory backend delta encodes snapshots
+            raise DebuggerError(
+                "keyframe_interval is only supported by the memory snapshot backend"
+            )
+        elif snapshot_backend == "disk":
+            return DiskSnapshotStore(memory_budget=capture_policy.memory_budget)
+        elif snapshot_backend in ("zlib", "lzma"):
+            return CompressedSnapshotStore(
+                compression=snapshot_backend,
+                memory_budget=capture_policy.memory_budget,
+            )
+
+        raise DebuggerError("Unknown snapshot backend: " + str(snapshot_backend))
+
+    @classmethod
+    def _get_renderer(cls, render_backend):
+        if render_backend == "inline":
+            return InlineRenderer()
+        elif render_backend == "process":
+            # the worker processes are started once and shared by all
+            # debugging sessions, so later sessions find them warmed up
+            if cls._process_renderer is None:
+                cls._process_renderer = ProcessRenderer()
+                atexit.register(cls.close)
+            return cls._process_renderer
+
+        raise DebuggerError("Unknown render backend: " + str(render_backend))
+
+    @classmethod
+    def _get_data_collector(
+        cls, transpilation_sequence, async_collection=False, capture_policy=None
+    ):
+        return TranspilerDataCollector(
+            transpilation_sequence,
+            async_collection=async_collection,
+            capture_policy=capture_policy,
+        )
@@ -1,9 +1,20 @@
 from .pass_type import PassType
 from .property import Property
-from .circuit_stats import CircuitStats
+from .property_history import PropertyHistory, PropertySnapshotter
+from .circuit_stats import CircuitStats, GateCountMatrix
+from .dag_snapshot import DAGSnapshot, DAGSnapshotter
+from .snapshot_store import BaseSnapshotStore, SnapshotStore
+from .serialized_snapshot_store import (
+    SerializedSnapshotStore,
+    DiskSnapshotStore,
+    CompressedSnapshotStore,
+)
+from .capture_policy import CapturePolicy
 from .log_entry import LogEntry
 
 from .logging_handler import TranspilerLoggingHandler
 from .data_collector import TranspilerDataCollector
 from .transpilation_sequence import TranspilationSequence
-from .circuit_comparator import CircuitComparator
\ No newline at end of file
+from .circuit_diff import CircuitDiff
+from .circuit_comparator import CircuitComparator
+from .circuit_window import CircuitWindow
\ No newline at end of file
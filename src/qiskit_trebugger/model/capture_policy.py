@@ -0,0 +1,62 @@
+from .pass_type import PassType
+
+
+class CapturePolicy:
+    """Rules deciding which steps of a transpilation keep a circuit snapshot.
+
+    Steps without a snapshot still get their ``CircuitStats``.
+
+    Args:
+        transformations_only (bool): snapshot transformation passes only.
+        pass_names (Iterable[str]): if given, snapshot only passes with these names.
+        every_nth (int): snapshot only every n-th of the passes selected above.
+        stats_only_above (int): keep only the stats of circuits with more gates.
+        max_depth (int): keep only the stats of deeper circuits.
+        memory_budget (int): estimated number of bytes the snapshots may take
+            in memory. Once exceeded, the oldest snapshots are dropped and
+            their steps keep only their stats. With the disk backend it only
+            bounds the snapshots cached in memory.
+    """
+
+    def __init__(
+        self,
+        transformations_only=True,
+        pass_names=None,
+        every_nth=1,
+        stats_only_above=None,
+        max_depth=None,
+        memory_budget=None,
+    ) -> None:
+        if every_nth < 1:
+            raise ValueError("every_nth must be a positive integer")
+
+        self.transformations_only = transformations_only
+        self.pass_names = None if pass_names is None else frozenset(pass_names)
+        self.every_nth = every_nth
+        self.stats_only_above = stats_only_above
+        self.max_depth = max_depth
+        self.memory_budget = memory_budget
+
+    def selects(self, pass_name, pass_type) -> bool:
+        """Whether a pass is a candidate for a snapshot."""
+        if self.transformations_only and pass_type != PassType.TRANSFORMATION:
+            return False
+        if self.pass_names is not None and pass_name not in self.pass_names:
+            return False
+        return True
+
+    def keeps(self, position, circuit_stats) -> bool:
+        """Whether the ``position``-th selected pass keeps its snapshot."""
+        if position % self.every_nth != 0:
+            return False
+        if self.max_depth is not None and circuit_stats.depth > self.max_depth:
+            return False
+        if (
+            self.stats_only_above is not None
+            and circuit_stats.size > self.stats_only_above
+        ):
+            return False
+        return True
+
+    def __repr__(self) -> str:
+        return f"CapturePolicy(transformations_only={self.transformations_only}, pass_names={self.pass_names}, every_nth={self.every_nth}, stats_only_above={self.stats_only_above}, max_depth={self.max_depth}, memory_budget={self.memory_budget})"
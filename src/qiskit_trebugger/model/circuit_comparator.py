@@ -1,82 +1,242 @@
+from typing import Tuple
+
 from qiskit import QuantumCircuit
-from qiskit.converters import dag_to_circuit, circuit_to_dag
-from numpy import zeros, uint16
+import numpy as np
+
+from .circuit_diff import CircuitDiff
+from .circuit_window import CircuitWindow
+from .dag_snapshot import op_signature
+
+# sub-problems up to this many table cells are solved with a full table,
+# larger ones are split in linear space (Hirschberg)
+LCS_TABLE_CELLS = 1 << 20
 
-# make the global DP array
-LCS_DP = zeros((2000, 2000), dtype=uint16)
+# the Myers diff gives up after this many edits and the LCS is used instead
+MYERS_MAX_EDITS = 512
 
 
 class CircuitComparator:
     @staticmethod
-    def get_moments(dag):
-        moments = [l["graph"] for l in list(dag.layers())]
-        return moments
+    def hash_layers(window, layer_ids) -> np.ndarray:
+        """Maps every layer of a ``CircuitWindow`` to an integer id.
+
+        ``layer_ids`` interns the structural signature of a layer and is
+        shared between the circuits being compared, so that two layers get
+        the same id exactly when they hold the same operations on the same
+        wires.
+        """
+        circuit = window.circuit
+        bit_indices = {bit: idx for idx, bit in enumerate(circuit.qubits)}
+        bit_indices.update({bit: idx for idx, bit in enumerate(circuit.clbits)})
+
+        signatures = [[] for _ in range(window.depth)]
+        for layer, (instruction, qargs, cargs) in zip(window.layers, circuit.data):
+            signatures[layer].append(
+                (
+                    op_signature(instruction),
+                    tuple(bit_indices[qarg] for qarg in qargs),
+                    tuple(bit_indices[carg] for carg in cargs),
+                )
+            )
+
+        ids = np.empty(window.depth, dtype=np.int64)
+        for idx, signature in enumerate(signatures):
+            ids[idx] = layer_ids.setdefault(tuple(sorted(signature)), len(layer_ids))
+        return ids
 
     @staticmethod
-    def make_LCS(moments1, moments2) -> None:
-        # moments1 : list of lists
-        # m2 : list of lists
+    def make_diff(ids1, ids2, backend="myers") -> list:
+        """Returns the ``(i, j)`` index pairs of a longest common subsequence.
+
+        The ``"myers"`` backend takes time proportional to the size of the
+        change and falls back to the LCS table once the sequences differ by
+        more than ``MYERS_MAX_EDITS`` layers. ``"lcs"`` always uses the table.
+        """
+        if backend not in ("myers", "lcs"):
+            raise ValueError("backend must be either 'myers' or 'lcs'")
+
+        n, m = len(ids1), len(ids2)
+
+        # common prefix and suffix do not need any diff
+        start = 0
+        while start < min(n, m) and ids1[start] == ids2[start]:
+            start += 1
+        end = 0
+        while end < min(n, m) - start and ids1[n - 1 - end] == ids2[m - 1 - end]:
+            end += 1
+
+        ids1 = ids1[start : n - end]
+        ids2 = ids2[start : m - end]
+
+        middle = None
+        if backend == "myers":
+            middle = CircuitComparator._myers_pairs(ids1, ids2, MYERS_MAX_EDITS)
+        if middle is None:
+            middle = CircuitComparator._lcs_pairs(ids1, ids2)
+
+        pairs = [(k, k) for k in range(start)]
+        pairs.extend((i + start, j + start) for i, j in middle)
+        pairs.extend((n - end + k, m - end + k) for k in range(end))
+        return pairs
 
-        # clear for the base cases of dp
-        for i in range(2000):
-            LCS_DP[i][0], LCS_DP[0][i] = 0, 0
-
-        n, m = len(moments1), len(moments2)
-
-        for i in range(1, n + 1):
-            for j in range(1, m + 1):
-                # if the layers are isomorphic then okay
-                if moments1[i - 1] == moments2[j - 1]:
-                    LCS_DP[i][j] = 1 + LCS_DP[i - 1][j - 1]
-                else:
-                    LCS_DP[i][j] = max(LCS_DP[i - 1][j], LCS_DP[i][j - 1])
+    @staticmethod
+    def make_LCS(ids1, ids2) -> list:
+        """Returns the ``(i, j)`` index pairs of a longest common subsequence."""
+        return CircuitComparator.make_diff(ids1, ids2, backend="lcs")
 
     @staticmethod
-    def compare(prev_circ, curr_circ) -> QuantumCircuit:
-        if prev_circ is None:
-            return (False, curr_circ)
+    def _myers_pairs(ids1, ids2, max_edits):
+        # greedy forward search of the shortest edit script (Myers 1986).
+        # furthest[k] is the furthest x reached on diagonal k = x - y, one
+        # copy of it is kept per edit count to walk the path back.
+        # Returns None if more than max_edits edits are needed
+        seq1, seq2 = ids1.tolist(), ids2.tolist()
+        n, m = len(seq1), len(seq2)
+
+        furthest = {1: 0}
+        trace = []
+        for edits in range(min(n + m, max_edits) + 1):
+            trace.append(dict(furthest))
+            for k in range(-edits, edits + 1, 2):
+                if k == -edits or (k != edits and furthest[k - 1] < furthest[k + 1]):
+                    x = furthest[k + 1]
+                else:
+                    x = furthest[k - 1] + 1
+                y = x - k
+                while x < n and y < m and seq1[x] == seq2[y]:
+                    x += 1
+                    y += 1
+                furthest[k] = x
 
-        # update by reference as there is no qasm now
-        prev_dag = circuit_to_dag(prev_circ)
-        curr_dag = circuit_to_dag(curr_circ)
+                if x >= n and y >= m:
+                    return CircuitComparator._myers_backtrack(trace, n, m)
 
-        moments1 = CircuitComparator.get_moments(prev_dag)
-        moments2 = CircuitComparator.get_moments(curr_dag)
+        return None
 
-        CircuitComparator.make_LCS(moments1, moments2)
+    @staticmethod
+    def _myers_backtrack(trace, n, m) -> list:
+        pairs = []
+        x, y = n, m
+        for edits in range(len(trace) - 1, -1, -1):
+            furthest = trace[edits]
+            k = x - y
+            if k == -edits or (k != edits and furthest[k - 1] < furthest[k + 1]):
+                prev_k = k + 1
+            else:
+                prev_k = k - 1
+            prev_x = furthest[prev_k]
+            prev_y = prev_x - prev_k
 
-        (n, m) = (len(moments1), len(moments2))
+            while x > prev_x and y > prev_y:
+                x -= 1
+                y -= 1
+                pairs.append((x, y))
 
-        id_set = set()
-        i = n
-        j = m
+            x, y = prev_x, prev_y
 
-        while i > 0 and j > 0:
-            if moments1[i - 1] == moments2[j - 1]:
+        pairs.reverse()
+        return pairs
 
-                # just want diff for second one
-                id_set.add(j - 1)
-                i -= 1
-                j -= 1
+    @staticmethod
+    def _lcs_rows(ids1, ids2):
+        # yields the rows of the LCS length table, one numpy vector each.
+        # curr[j] = max(prev[j], curr[j - 1], prev[j - 1] + 1 on a match),
+        # which unrolls to a running maximum over the row
+        prev = np.zeros(len(ids2) + 1, dtype=np.int32)
+        yield prev
+        for value in ids1:
+            curr = prev.copy()
+            matches = np.flatnonzero(ids2 == value) + 1
+            curr[matches] = np.maximum(curr[matches], prev[matches - 1] + 1)
+            np.maximum.accumulate(curr, out=curr)
+            yield curr
+            prev = curr
 
-            else:
-                if LCS_DP[i - 1][j] > LCS_DP[i][j - 1]:
-                    # means the graph came from the
-                    # first circuit , go up
+    @staticmethod
+    def _lcs_pairs(ids1, ids2) -> list:
+        n, m = len(ids1), len(ids2)
+        if n == 0 or m == 0:
+            return []
+
+        if n == 1:
+            matches = np.flatnonzero(ids2 == ids1[0])
+            return [(0, int(matches[0]))] if len(matches) > 0 else []
+
+        if (n + 1) * (m + 1) <= LCS_TABLE_CELLS:
+            table = np.array(list(CircuitComparator._lcs_rows(ids1, ids2)))
+
+            pairs = []
+            i, j = n, m
+            while i > 0 and j > 0:
+                if ids1[i - 1] == ids2[j - 1]:
+                    pairs.append((i - 1, j - 1))
+                    i -= 1
+                    j -= 1
+                elif table[i - 1][j] > table[i][j - 1]:
                     i -= 1
                 else:
-                    # if equal or small, go left
                     j -= 1
+            pairs.reverse()
+            return pairs
+
+        # Hirschberg: split the first sequence in half and find where the
+        # second one is split by an optimal alignment
+        mid = n // 2
+        for forward in CircuitComparator._lcs_rows(ids1[:mid], ids2):
+            pass
+        for backward in CircuitComparator._lcs_rows(ids1[mid:][::-1], ids2[::-1]):
+            pass
+        split = int(np.argmax(forward + backward[::-1]))
+
+        left = CircuitComparator._lcs_pairs(ids1[:mid], ids2[:split])
+        right = CircuitComparator._lcs_pairs(ids1[mid:], ids2[split:])
+        return left + [(i + mid, j + split) for i, j in right]
 
-        # if the whole circuit has not changed
-
-        fully_changed = len(id_set) == 0
+    @staticmethod
+    def diff(prev_circ, curr_circ, backend="myers") -> CircuitDiff:
+        """Returns the ``CircuitDiff`` of two circuits, layer by layer.
+
+        Instructions on layers of a longest common subsequence of the layers
+        are retained, all others are added or removed.
+        """
+        prev_window = CircuitWindow(prev_circ)
+        curr_window = CircuitWindow(curr_circ)
+
+        layer_ids = {}
+        ids1 = CircuitComparator.hash_layers(prev_window, layer_ids)
+        ids2 = CircuitComparator.hash_layers(curr_window, layer_ids)
+        pairs = np.array(
+            CircuitComparator.make_diff(ids1, ids2, backend), dtype=np.int64
+        ).reshape(-1, 2)
+
+        prev_kept = np.zeros(prev_window.depth, dtype=bool)
+        prev_kept[pairs[:, 0]] = True
+        curr_kept = np.zeros(curr_window.depth, dtype=bool)
+        curr_kept[pairs[:, 1]] = True
+
+        prev_kept = prev_kept[np.array(prev_window.layers, dtype=np.int64)]
+        curr_kept = curr_kept[np.array(curr_window.layers, dtype=np.int64)]
+
+        return CircuitDiff(
+            prev_circ,
+            curr_circ,
+            added=np.flatnonzero(~curr_kept),
+            removed=np.flatnonzero(~prev_kept),
+            retained=np.flatnonzero(curr_kept),
+            layers=curr_window.layers,
+        )
 
-        if not fully_changed:
-            for id2, l in enumerate(list(curr_dag.layers())):
-                if id2 not in id_set:
-                    # this is not an LCS node -> highlight it
-                    for node in l["graph"].front_layer():
-                        node.name = node.name + " "
+    @staticmethod
+    def compare(
+        prev_circ, curr_circ, backend="myers"
+    ) -> Tuple[bool, QuantumCircuit]:
+        """Returns whether the circuit changed fully, and the circuit.
+
+        Kept for compatibility, the circuit is returned unchanged; use
+        ``diff`` to get the added instructions to highlight.
+        """
+        if prev_circ is None:
+            return (False, curr_circ)
 
-        return (fully_changed, dag_to_circuit(curr_dag))
+        diff = CircuitComparator.diff(prev_circ, curr_circ, backend)
+        return (diff.fully_changed, curr_circ)
@@ -0,0 +1,61 @@
+import numpy as np
+
+
+class CircuitDiff:
+    """Gate level difference between two circuits.
+
+    Instructions are identified by their index in ``circuit.data``:
+    ``added`` and ``retained`` index into ``circuit``, ``removed`` indexes
+    into ``prev_circuit``. ``regions`` holds, for every qubit of ``circuit``,
+    the ``[start, stop)`` layer ranges touched by added instructions.
+
+    Neither circuit is modified, so a diff can be cached and shared; the
+    views colour the ``added`` instructions in ``HIGHLIGHT_COLORS`` when
+    drawing.
+    """
+
+    HIGHLIGHT_COLORS = ("orange", "black")
+
+    def __init__(self, prev_circuit, circuit, added, removed, retained, layers) -> None:
+        self.prev_circuit = prev_circuit
+        self.circuit = circuit
+        self.added = self._index_array(added)
+        self.removed = self._index_array(removed)
+        self.retained = self._index_array(retained)
+
+        qubit_indices = {qubit: idx for idx, qubit in enumerate(circuit.qubits)}
+        qubit_layers = [[] for _ in range(circuit.num_qubits)]
+        for idx in self.added:
+            for qubit in circuit.data[idx][1]:
+                qubit_layers[qubit_indices[qubit]].append(layers[idx])
+
+        self.regions = [self._layer_ranges(wire_layers) for wire_layers in qubit_layers]
+
+    @property
+    def fully_changed(self) -> bool:
+        """Whether no instruction of the circuit was kept from the previous one."""
+        return len(self.retained) == 0
+
+    @property
+    def changed(self) -> bool:
+        return len(self.added) > 0 or len(self.removed) > 0
+
+    @staticmethod
+    def _index_array(indices) -> np.ndarray:
+        array = np.array(indices, dtype=np.int64)
+        array.flags.writeable = False
+        return array
+
+    @staticmethod
+    def _layer_ranges(layers) -> np.ndarray:
+        layers = np.unique(np.array(layers, dtype=np.int64))
+        if len(layers) == 0:
+            return np.empty((0, 2), dtype=np.int64)
+
+        breaks = np.flatnonzero(np.diff(layers) > 1) + 1
+        starts = layers[np.r_[0, breaks]]
+        stops = layers[np.r_[breaks - 1, len(layers) - 1]] + 1
+        return np.stack([starts, stops], axis=1)
+
+    def __repr__(self) -> str:
+        return f"CircuitDiff(added={len(self.added)}, removed={len(self.removed)}, retained={len(self.retained)})"
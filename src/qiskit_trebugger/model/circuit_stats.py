@@ -1,3 +1,6 @@
+import numpy as np
+
+
 class CircuitStats:
     def __init__(self) -> None:
         self.width = None
@@ -6,9 +9,102 @@ class CircuitStats:
         self.ops_1q = None
         self.ops_2q = None
         self.ops_3q = None
+        self.ops_count = {}
+
+    @classmethod
+    def from_snapshot(cls, snapshot) -> "CircuitStats":
+        """Computes the stats of a ``DAGSnapshot`` in a single pass.
+
+        The depth is the one computed by ``DAGCircuit.depth`` when the
+        snapshot was captured; the pass only counts the operations.
+        """
+        ops_count = {}
+        ops_1q = 0
+        ops_2q = 0
+        ops_3q = 0
+        for op, qargs, _ in snapshot.records:
+            ops_count[op.name] = ops_count.get(op.name, 0) + 1
+            if getattr(op, "_directive", False):
+                continue
+
+            if len(qargs) == 1:
+                ops_1q += 1
+            elif len(qargs) == 2:
+                ops_2q += 1
+            else:
+                ops_3q += 1
+
+        stats = cls()
+        stats.width = len(snapshot.qubits) + len(snapshot.clbits)
+        stats.size = len(snapshot.records)
+        stats.depth = snapshot.depth
+        stats.ops_1q = ops_1q
+        stats.ops_2q = ops_2q
+        stats.ops_3q = ops_3q
+        stats.ops_count = ops_count
+
+        return stats
 
     def __eq__(self, other):
-        return self.width == other.width and self.size == other.size and self.depth == other.depth and self.ops_1q == other.ops_1q and self.ops_2q == other.ops_2q and self.ops_3q == other.ops_3q
+        return self.width == other.width and self.size == other.size and self.depth == other.depth and self.ops_1q == other.ops_1q and self.ops_2q == other.ops_2q and self.ops_3q == other.ops_3q and self.ops_count == other.ops_count
 
     def __repr__(self) -> str:
-        return f"CircuitStats(width={self.width}, size={self.size}, depth={self.depth}, 1q-ops={self.ops_1q}, 2q-ops={self.ops_2q}, 3+q-ops={self.ops_3q})"
\ No newline at end of file
+        return f"CircuitStats(width={self.width}, size={self.size}, depth={self.depth}, 1q-ops={self.ops_1q}, 2q-ops={self.ops_2q}, 3+q-ops={self.ops_3q})"
+
+
+class GateCountMatrix:
+    """Sparse step x gate-type matrix of the gate counts of a transpilation.
+
+    Entries are kept in coordinate form, one row per step and one column per
+    gate type (in order of first appearance, see ``gate_types``).
+    """
+
+    def __init__(self) -> None:
+        self.gate_types = []
+        self._gate_ids = {}
+        self._num_steps = 0
+        self._rows = []
+        self._cols = []
+        self._counts = []
+
+    def gate_id(self, gate_type) -> int:
+        """Returns the column of ``gate_type``, registering it if needed."""
+        if gate_type not in self._gate_ids:
+            self._gate_ids[gate_type] = len(self.gate_types)
+            self.gate_types.append(gate_type)
+        return self._gate_ids[gate_type]
+
+    def add(self, step_index, ops_count) -> None:
+        for gate_type, count in ops_count.items():
+            if count:
+                self._rows.append(step_index)
+                self._cols.append(self.gate_id(gate_type))
+                self._counts.append(count)
+        self._num_steps = max(self._num_steps, step_index + 1)
+
+    @property
+    def shape(self):
+        return (self._num_steps, len(self.gate_types))
+
+    def to_coo(self):
+        """Returns the ``(rows, cols, counts)`` arrays of the non-zero entries."""
+        return (
+            np.array(self._rows, dtype=np.intp),
+            np.array(self._cols, dtype=np.intp),
+            np.array(self._counts, dtype=np.int64),
+        )
+
+    def to_dense(self) -> np.ndarray:
+        rows, cols, counts = self.to_coo()
+        dense = np.zeros(self.shape, dtype=np.int64)
+        dense[rows, cols] = counts
+        return dense
+
+    def counts_of(self, gate_type) -> np.ndarray:
+        """Returns the count of ``gate_type`` for every step."""
+        column = np.zeros(self._num_steps, dtype=np.int64)
+        if gate_type in self._gate_ids:
+            rows, cols, counts = self.to_coo()
+            mask = cols == self._gate_ids[gate_type]
+            column[rows[mask]] = counts[mask]
+        return column
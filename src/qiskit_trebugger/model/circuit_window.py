@@ -0,0 +1,77 @@
+from qiskit import QuantumCircuit
+from qiskit.circuit import ClassicalRegister
+from qiskit.circuit.library import Barrier
+
+
+class CircuitWindow:
+    """Cuts ranges of layers and qubits out of a circuit for display.
+
+    Instructions are assigned to layers as soon as all their wires are free,
+    the same way ``DAGCircuit.layers`` does, so that the layers of a window
+    match the layers of the full circuit.
+    """
+
+    def __init__(self, circuit) -> None:
+        self.circuit = circuit
+        self.num_qubits = circuit.num_qubits
+        self.layers = []
+
+        qubit_indices = {qubit: idx for idx, qubit in enumerate(circuit.qubits)}
+        self._qubits = []
+
+        wire_depth = {}
+        for instruction, qargs, cargs in circuit.data:
+            wires = list(qargs) + list(cargs)
+            if instruction.condition is not None:
+                if isinstance(instruction.condition[0], ClassicalRegister):
+                    wires.extend(instruction.condition[0])
+                else:
+                    wires.append(instruction.condition[0])
+
+            layer = max([wire_depth.get(wire, 0) for wire in wires], default=0)
+            for wire in wires:
+                wire_depth[wire] = layer + 1
+
+            self.layers.append(layer)
+            self._qubits.append([qubit_indices[qubit] for qubit in qargs])
+
+        self.depth = max(wire_depth.values(), default=0)
+
+    def cut(self, layer_start, layer_stop, qubit_start, qubit_stop):
+        """Returns the window circuit, the number of omitted instructions and
+        the index in ``circuit.data`` of every instruction of the window.
+
+        Instructions on layers in ``[layer_start, layer_stop)`` acting only on
+        qubits in ``[qubit_start, qubit_stop)`` are kept. Barriers are cut
+        down to the window, other instructions crossing its qubit boundary
+        are omitted and counted.
+        """
+        circuit = self.circuit
+        qubits = circuit.qubits[qubit_start:qubit_stop]
+
+        window = QuantumCircuit(list(qubits), *circuit.cregs, name=circuit.name)
+        window_clbits = set(window.clbits)
+        loose_clbits = [clbit for clbit in circuit.clbits if clbit not in window_clbits]
+        if loose_clbits:
+            window.add_bits(loose_clbits)
+
+        omitted = 0
+        indices = []
+        for idx, (instruction, qargs, cargs) in enumerate(circuit.data):
+            if not layer_start <= self.layers[idx] < layer_stop:
+                continue
+
+            inside = [qubit_start <= qubit < qubit_stop for qubit in self._qubits[idx]]
+            if all(inside):
+                window._append(instruction, qargs, cargs)
+                indices.append(idx)
+            elif not any(inside):
+                continue
+            elif instruction.name == "barrier":
+                kept = [qarg for qarg, keep in zip(qargs, inside) if keep]
+                window._append(Barrier(len(kept)), kept, [])
+                indices.append(idx)
+            else:
+                omitted += 1
+
+        return window, omitted, indices
@@ -0,0 +1,207 @@
+import hashlib
+
+from qiskit.dagcircuit import DAGCircuit
+
+
+class DAGSnapshot:
+    """Immutable capture of a ``DAGCircuit`` taken after a transpiler pass.
+
+    A snapshot keeps the circuit as a topologically ordered tuple of
+    ``(operation, qargs, cargs)`` records. Operations, bits and registers are
+    shared with the previous snapshot whenever the pass left them untouched.
+    The ``fingerprint`` is a structural hash of the records, the registers
+    and the calibrated gates: two snapshots with the same fingerprint
+    describe the same circuit.
+    """
+
+    def __init__(
+        self,
+        name,
+        global_phase,
+        calibrations,
+        metadata,
+        qubits,
+        clbits,
+        qregs,
+        cregs,
+        records,
+        fingerprint=None,
+        depth=None,
+    ) -> None:
+        self.name = name
+        self.global_phase = global_phase
+        self.calibrations = calibrations
+        self.metadata = metadata
+        self.qubits = qubits
+        self.clbits = clbits
+        self.qregs = qregs
+        self.cregs = cregs
+        self.records = records
+        self.fingerprint = fingerprint
+        self.depth = depth
+
+    def to_dag(self) -> DAGCircuit:
+        """Rebuilds an independent ``DAGCircuit`` from the snapshot."""
+        dag = DAGCircuit()
+        dag.name = self.name
+        dag.global_phase = self.global_phase
+        dag.calibrations = _copy_calibrations(self.calibrations)
+        dag.metadata = self.metadata
+
+        dag.add_qubits(list(self.qubits))
+        dag.add_clbits(list(self.clbits))
+        for qreg in self.qregs:
+            dag.add_qreg(qreg)
+        for creg in self.cregs:
+            dag.add_creg(creg)
+
+        for op, qargs, cargs in self.records:
+            dag.apply_operation_back(op.copy(), qargs, cargs)
+
+        return dag
+
+    def with_records(self, records) -> "DAGSnapshot":
+        """Returns a snapshot with the same bits and registers but other records."""
+        return DAGSnapshot(
+            self.name,
+            self.global_phase,
+            self.calibrations,
+            self.metadata,
+            self.qubits,
+            self.clbits,
+            self.qregs,
+            self.cregs,
+            records,
+            self.fingerprint,
+            self.depth,
+        )
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __repr__(self) -> str:
+        return f"DAGSnapshot(name={self.name}, width={len(self.qubits) + len(self.clbits)}, size={len(self.records)})"
+
+
+class DAGSnapshotter:
+    """Captures ``DAGSnapshot`` objects, sharing operations between captures.
+
+    Operations of the live DAG are copied the first time they are seen. As
+    long as a later pass keeps the same operation object in the DAG, with the
+    same signature, the copy made for the previous snapshot is reused instead
+    of copying it again. Passes which change an operation in place (its
+    params, condition, duration or label) get a new copy, so the earlier
+    snapshots keep the operation as it was.
+    """
+
+    def __init__(self) -> None:
+        # id(live op) -> (live op, frozen copy, signature of the copy). Holding
+        # the live op keeps its id from being reused while the mapping is alive.
+        self._shared_ops = {}
+
+    def capture(self, dag, fingerprint=True) -> DAGSnapshot:
+        """Captures ``dag``. Without ``fingerprint`` the snapshot is left
+        without one, ``snapshot_fingerprint`` can compute it later.
+        """
+        shared_ops = {}
+        records = []
+        signatures = []
+        for node in dag.topological_op_nodes():
+            op = node.op
+            signature = op_signature(op)
+            entry = shared_ops.get(id(op)) or self._shared_ops.get(id(op))
+            if entry is None or entry[2] != signature:
+                # new, or changed in place since its copy was made
+                entry = (op, op.copy(), signature)
+            shared_ops[id(op)] = entry
+
+            records.append((entry[1], tuple(node.qargs), tuple(node.cargs)))
+            signatures.append(signature)
+
+        # only operations still present in the DAG are worth remembering
+        self._shared_ops = shared_ops
+
+        snapshot = DAGSnapshot(
+            dag.name,
+            dag.global_phase,
+            _copy_calibrations(dag.calibrations),
+            dag.metadata,
+            tuple(dag.qubits),
+            tuple(dag.clbits),
+            tuple(dag.qregs.values()),
+            tuple(dag.cregs.values()),
+            tuple(records),
+            depth=dag.depth(),
+        )
+        if fingerprint:
+            snapshot.fingerprint = snapshot_fingerprint(snapshot, signatures)
+        return snapshot
+
+
+def _copy_calibrations(calibrations) -> dict:
+    # the schedules of a gate are kept in a dict the DAG changes in place
+    return {gate: dict(schedules) for gate, schedules in calibrations.items()}
+
+
+def snapshot_fingerprint(snapshot, signatures=None) -> str:
+    """Structural hash of a ``DAGSnapshot``.
+
+    ``signatures`` are the ``op_signature`` of the records, computed from
+    the records if not given.
+    """
+    qubit_indices = {qubit: idx for idx, qubit in enumerate(snapshot.qubits)}
+    clbit_indices = {clbit: idx for idx, clbit in enumerate(snapshot.clbits)}
+    if signatures is None:
+        signatures = [op_signature(op) for op, _, _ in snapshot.records]
+
+    fingerprint = hashlib.blake2b(digest_size=16)
+    fingerprint.update(
+        f"{len(qubit_indices)},{len(clbit_indices)},{snapshot.global_phase}".encode()
+    )
+    # passes may only rename registers or attach calibrations, including
+    # new schedules for gates which were calibrated already
+    fingerprint.update(
+        repr(
+            (
+                [(reg.name, reg.size) for reg in snapshot.qregs],
+                [(reg.name, reg.size) for reg in snapshot.cregs],
+                sorted(
+                    (name, repr(key), repr(schedule))
+                    for name, schedules in snapshot.calibrations.items()
+                    for key, schedule in schedules.items()
+                ),
+            )
+        ).encode()
+    )
+
+    for (_, qargs, cargs), signature in zip(snapshot.records, signatures):
+        fingerprint.update(signature)
+        fingerprint.update(
+            repr(
+                (
+                    [qubit_indices[qubit] for qubit in qargs],
+                    [clbit_indices[clbit] for clbit in cargs],
+                )
+            ).encode()
+        )
+
+    return fingerprint.hexdigest()
+
+
+def op_signature(op) -> bytes:
+    """Structural signature of an operation: name, arity, params, condition,
+    duration and label."""
+    params = []
+    for param in op.params:
+        if hasattr(param, "tobytes"):
+            # matrices of unitary-like gates
+            params.append(hashlib.blake2b(param.tobytes(), digest_size=8).hexdigest())
+        else:
+            params.append(repr(param))
+
+    return (
+        f"{op.name}/{op.num_qubits}/{op.num_clbits}"
+        f"({','.join(params)}){op.condition!r}"
+        f"/{getattr(op, 'duration', None)!r}{getattr(op, 'unit', '')}"
+        f"/{getattr(op, 'label', None)!r};"
+    ).encode()
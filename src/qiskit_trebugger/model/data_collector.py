@@ -1,15 +1,66 @@
-from collections import defaultdict
+from queue import Empty, Queue
+from threading import Thread
+from time import perf_counter_ns
 from .pass_type import PassType
-from .property import Property
+from .property_history import PropertySnapshotter
+from .capture_policy import CapturePolicy
+from .circuit_stats import CircuitStats
+from .dag_snapshot import DAGSnapshotter, snapshot_fingerprint
 from .transpilation_step import TranspilationStep
 
 
 class TranspilerDataCollector:
-    def __init__(self, transpilation_sequence) -> None:
+    """Collects a ``TranspilationStep`` for every pass run by the transpiler.
+
+    With ``async_collection`` the transpiler callback only captures a cheap
+    immutable handle of the pass (a ``DAGSnapshot`` without its fingerprint
+    and the content hashes of the property set) and queues it. A worker
+    thread fingerprints the snapshot, computes the stats and adds the steps
+    to the sequence. The finished steps are handed back to the thread of the
+    transpiler, which notifies the sequence's listener from ``flush``, called
+    on every pass. When ``queue_size`` handles are pending the callback
+    blocks until the worker catches up. Call ``close`` once the
+    transpilation is done.
+
+    The collector's own cost is recorded on every step in nanoseconds, split
+    into phases. The cost paid in the transpiler callback, including the
+    time blocked on a full queue (``queue``), is kept in
+    ``TranspilationStep.overhead``; the cost paid by the worker is kept in
+    ``TranspilationStep.worker_overhead``.
+
+    Which steps keep their snapshot is decided by ``capture_policy``.
+    """
+
+    def __init__(
+        self,
+        transpilation_sequence,
+        async_collection=False,
+        queue_size=16,
+        capture_policy=None,
+    ) -> None:
         self.transpilation_sequence = transpilation_sequence
-        self._properties = {}
+        self.capture_policy = capture_policy or CapturePolicy()
+        self._selected_count = 0
+        self._snapshotter = DAGSnapshotter()
+        self._property_snapshotter = PropertySnapshotter()
+        self._last_fingerprint = None
+        self._passes_count = 0
+
+        self._async = async_collection
+        self._queue = None
+        self._worker = None
+        self._worker_error = None
+        # steps added by the worker, waiting to be notified
+        self._finished = Queue()
+        if async_collection:
+            self._queue = Queue(maxsize=queue_size)
+            self._worker = Thread(target=self._consume, daemon=True)
+            self._worker.start()
 
         def callback(**kwargs):
+            self.flush()
+
+            start = perf_counter_ns()
             pass_ = kwargs["pass_"]
 
             pass_name = pass_.name()
@@ -26,80 +77,126 @@ class TranspilerDataCollector:
             duration_value = round(1000 * kwargs["time"], 2)
             transpilation_step.duration = duration_value
 
-            # Properties
-            property_set = kwargs["property_set"]
-            _added_props = []
-            _updated_props = []
-            for key in property_set:
-                value = property_set[key]
-                if key not in self._properties.keys():
-                    _added_props.append(key)
-                elif (self._properties[key] is None) and (value is not None):
-                    _updated_props.append(key)
-                elif hasattr(value, "__len__") and (
-                    len(value) != len(self._properties[key])
-                ):
-                    _updated_props.append(key)
-
-            if len(_added_props) > 0 or len(_updated_props) > 0:
-                for property_name in property_set:
-                    self._properties[property_name] = property_set[property_name]
-
-                    property_type = type(property_set[property_name])
-                    property_value = property_set[property_name]
-
-                    property_state = ""
-                    if property_name in _added_props:
-                        property_state = "new"
-                    elif property_name in _updated_props:
-                        property_state = "updated"
-
-                    transpilation_step.property_set[property_name] = Property(
-                        property_name, property_type, property_value, property_state
-                    )
-
-            from copy import deepcopy
-
-            dag = deepcopy(kwargs["dag"])
-
-            # circuit stats:
-            if pass_.is_analysis_pass and len(self.transpilation_sequence.steps) > 0:
-                transpilation_step.circuit_stats = self.transpilation_sequence.steps[
-                    -1
-                ].circuit_stats
-            else:
-                transpilation_step.circuit_stats.width = dag.width()
-                transpilation_step.circuit_stats.size = dag.size()
-                transpilation_step.circuit_stats.depth = dag.depth()
-
-                nodes = dag.op_nodes(include_directives=False)
-                circ_ops_1q = 0
-                circ_ops_2q = 0
-                circ_ops_3q = 0
-                for node in nodes:
-                    operands_count = len(node.qargs)
-                    if operands_count == 1:
-                        circ_ops_1q += 1
-                    elif operands_count == 2:
-                        circ_ops_2q += 1
-                    else:
-                        circ_ops_3q += 1
-
-                transpilation_step.circuit_stats.ops_1q = circ_ops_1q
-                transpilation_step.circuit_stats.ops_2q = circ_ops_2q
-                transpilation_step.circuit_stats.ops_3q = circ_ops_3q
-
-            # Store `dag` to use it for circuit plot generation:
+            # logs are matched by pass name, take them before the pass runs again:
+            transpilation_step.logs = self.transpilation_sequence.pop_logs(pass_name)
+
+            # Analysis passes can not change the DAG, so they only need a
+            # snapshot if the policy asks for one or there are no stats to reuse:
+            snapshot = None
             if (
-                transpilation_step.type == PassType.TRANSFORMATION
-                and transpilation_step.circuit_stats.depth <= 300
+                transpilation_step.type != PassType.ANALYSIS
+                or not self.capture_policy.transformations_only
+                or self._passes_count == 0
             ):
-                transpilation_step.dag = dag
+                snapshot = self._snapshotter.capture(
+                    kwargs["dag"], fingerprint=not self._async
+                )
+            self._passes_count += 1
+
+            transpilation_step.overhead["copy"] = perf_counter_ns() - start
 
-            self.transpilation_sequence.add_step(transpilation_step)
+            # hashed now, later passes may change the values in place:
+            start = perf_counter_ns()
+            property_set = self._property_snapshotter.capture(kwargs["property_set"])
+            transpilation_step.overhead["properties"] = perf_counter_ns() - start
+
+            if self._queue is None:
+                self._collect(transpilation_step, snapshot, property_set)
+            else:
+                start = perf_counter_ns()
+                self._queue.put((transpilation_step, snapshot, property_set))
+                # blocked while the worker catches up
+                transpilation_step.overhead["queue"] = perf_counter_ns() - start
 
         self._transpiler_callback = callback
 
     @property
     def transpiler_callback(self):
         return self._transpiler_callback
+
+    def flush(self) -> None:
+        """Notifies the steps finished by the worker, on the calling thread."""
+        while True:
+            try:
+                transpilation_step = self._finished.get_nowait()
+            except Empty:
+                return
+            self.transpilation_sequence.notify(transpilation_step)
+
+    def close(self) -> None:
+        """Waits for all queued passes to be collected and stops the worker."""
+        if self._worker is None:
+            return
+
+        self._queue.put(None)
+        self._worker.join()
+        self._worker = None
+        self._queue = None
+        self.flush()
+
+        if self._worker_error is not None:
+            raise self._worker_error
+
+    def _consume(self):
+        while True:
+            handle = self._queue.get()
+            if handle is None:
+                break
+
+            # keep draining after a failure so the transpiler never blocks
+            if self._worker_error is None:
+                try:
+                    self._collect(*handle)
+                except Exception as error:  # pylint: disable=broad-except
+                    self._worker_error = error
+
+    def _collect(self, transpilation_step, snapshot, property_set):
+        start = perf_counter_ns()
+        if self._async:
+            overhead = transpilation_step.worker_overhead
+        else:
+            overhead = transpilation_step.overhead
+
+        if snapshot is not None and snapshot.fingerprint is None:
+            snapshot.fingerprint = snapshot_fingerprint(snapshot)
+
+        # Transformation passes that left the DAG structurally unchanged
+        # reuse the previous snapshot and stats:
+        if transpilation_step.type == PassType.TRANSFORMATION:
+            transpilation_step.unchanged = (
+                snapshot.fingerprint == self._last_fingerprint
+            )
+            self._last_fingerprint = snapshot.fingerprint
+
+        # circuit stats:
+        if (
+            transpilation_step.type == PassType.ANALYSIS or transpilation_step.unchanged
+        ) and len(self.transpilation_sequence.steps) > 0:
+            transpilation_step.circuit_stats = self.transpilation_sequence.steps[
+                -1
+            ].circuit_stats
+        else:
+            transpilation_step.circuit_stats = CircuitStats.from_snapshot(snapshot)
+
+        overhead["stats"] = perf_counter_ns() - start
+
+        # Keep the snapshot to use it for circuit plot generation:
+        keep_snapshot = False
+        if self.capture_policy.selects(transpilation_step.name, transpilation_step.type):
+            keep_snapshot = self.capture_policy.keeps(
+                self._selected_count, transpilation_step.circuit_stats
+            )
+            self._selected_count += 1
+
+        if not keep_snapshot:
+            snapshot = None
+
+        self.transpilation_sequence.add_step(
+            transpilation_step,
+            snapshot,
+            property_set,
+            notify=not self._async,
+            overhead=overhead,
+        )
+        if self._async:
+            self._finished.put(transpilation_step)
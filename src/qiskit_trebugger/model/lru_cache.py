@@ -0,0 +1,59 @@
+from collections import OrderedDict
+from threading import Lock
+
+
+class LRUCache:
+    """Thread-safe least recently used cache with hit and miss counters."""
+
+    def __init__(self, maxsize=128) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be a positive integer")
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+
+            self.misses += 1
+            return default
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._items.pop(key, default)
+
+    def popitem(self):
+        """Removes and returns the least recently used ``(key, value)``."""
+        with self._lock:
+            return self._items.popitem(last=False)
+
+    def values(self) -> list:
+        with self._lock:
+            return list(self._items.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def __contains__(self, key) -> bool:
+        return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __repr__(self) -> str:
+        return f"LRUCache(size={len(self._items)}/{self.maxsize}, hits={self.hits}, misses={self.misses})"
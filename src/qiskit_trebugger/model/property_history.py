@@ -0,0 +1,141 @@
+import hashlib
+import pickle
+from bisect import bisect_right
+
+from .property import Property
+
+
+class PropertySnapshotter:
+    """Captures the property set after every pass for a ``PropertyHistory``.
+
+    The content of every property is pickled and hashed when a pass is
+    done, so values the next passes change in place are told apart. When the
+    hash did not change, the previous capture of the value is returned and
+    the new bytes are dropped.
+    """
+
+    def __init__(self) -> None:
+        # property name -> its last capture
+        self._captured = {}
+
+    def capture(self, property_set) -> dict:
+        """Returns ``{property name: (content hash, pickled value, value)}``."""
+        captured = {}
+        for name, value in property_set.items():
+            digest, payload = _content_hash(value)
+            last = self._captured.get(name)
+            if last is not None and last[0] == digest:
+                captured[name] = last
+            else:
+                captured[name] = (digest, payload, value)
+
+        self._captured = captured
+        return captured
+
+
+class PropertyHistory:
+    """Records the property set of a transpilation as per-step diffs.
+
+    ``record`` compares the hashes captured by a ``PropertySnapshotter``
+    with the last recorded versions. A property is only copied when its
+    content changes; the copy is made by unpickling the bytes it was hashed
+    from. Values which can not be pickled are compared by their ``repr`` and
+    kept as the live object: a later pass changing such a value in place
+    also changes it in the earlier steps.
+
+    ``value_at`` and ``properties_at`` look up the versions of a step by
+    bisection over the steps which changed each property.
+    """
+
+    def __init__(self) -> None:
+        # property name -> content hash of its last version
+        self._hashes = {}
+        # property name -> step indices which changed it, and the
+        # Property recorded by each of them (None once removed)
+        self._steps = {}
+        self._versions = {}
+        # step index -> {property name: "new", "updated" or "removed"}
+        self._diffs = {}
+        # step indices with a diff, in order
+        self.changed_steps = []
+
+    def record(self, step_index, captured) -> dict:
+        """Records the property set after step ``step_index``, as returned by
+        ``PropertySnapshotter.capture``.
+
+        Returns the diff of the step, ``{property name: state}``.
+        """
+        diff = {}
+        for name, (digest, payload, value) in captured.items():
+            if self._hashes.get(name) == digest:
+                continue
+
+            state = "new" if self._hashes.get(name) is None else "updated"
+            self._hashes[name] = digest
+            if payload is not None:
+                value = pickle.loads(payload)
+            self._add_version(
+                step_index, name, Property(name, type(value), value, state)
+            )
+            diff[name] = state
+
+        for name in self._hashes:
+            if self._hashes[name] is not None and name not in captured:
+                self._hashes[name] = None
+                self._add_version(step_index, name, None)
+                diff[name] = "removed"
+
+        if diff:
+            self._diffs[step_index] = diff
+            self.changed_steps.append(step_index)
+        return diff
+
+    def _add_version(self, step_index, name, property):
+        self._steps.setdefault(name, []).append(step_index)
+        self._versions.setdefault(name, []).append(property)
+
+    def diff(self, step_index) -> dict:
+        """Returns ``{property name: state}`` for the properties changed by
+        step ``step_index``."""
+        return self._diffs.get(step_index, {})
+
+    def property_at(self, step_index, name) -> Property:
+        """Returns the version of property ``name`` after step ``step_index``,
+        or ``None`` if it did not exist then."""
+        steps = self._steps.get(name)
+        if steps is None:
+            return None
+
+        idx = bisect_right(steps, step_index) - 1
+        return None if idx < 0 else self._versions[name][idx]
+
+    def value_at(self, step_index, name):
+        """Returns the value of property ``name`` after step ``step_index``."""
+        property = self.property_at(step_index, name)
+        if property is None:
+            raise KeyError(name)
+        return property.value
+
+    def properties_at(self, step_index) -> dict:
+        """Returns the properties after step ``step_index`` by name."""
+        properties = {}
+        for name in self._steps:
+            property = self.property_at(step_index, name)
+            if property is not None:
+                properties[name] = property
+        return properties
+
+    def __len__(self) -> int:
+        return len(self.changed_steps)
+
+
+def _content_hash(value):
+    try:
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+    except Exception:  # pylint: disable=broad-except
+        payload = None
+        content = repr(value).encode()
+    else:
+        content = payload
+
+    return hashlib.blake2b(content, digest_size=16).digest(), payload
@@ -0,0 +1,155 @@
+import lzma
+import os
+import shutil
+import zlib
+import tempfile
+import weakref
+from abc import abstractmethod
+from io import BytesIO
+
+from qiskit.circuit import qpy_serialization
+from qiskit.converters import circuit_to_dag, dag_to_circuit
+from qiskit.dagcircuit import DAGCircuit
+
+from .lru_cache import LRUCache
+from .snapshot_store import BaseSnapshotStore, _RECORD_BYTES
+
+
+class SerializedSnapshotStore(BaseSnapshotStore):
+    """Base of the snapshot stores that keep every snapshot as QPY bytes.
+
+    Subclasses decide where the bytes are kept by implementing ``_write``,
+    ``_read`` and ``_remove``. Only the ``cache_size`` most recently used
+    circuits are kept deserialized; ``hits`` and ``misses`` count how often
+    that window served a ``get``.
+
+    Snapshots are not delta encoded, so there is no keyframe interval. By
+    default the ``memory_budget`` bounds the serialized payloads.
+    """
+
+    def __init__(self, cache_size=8, memory_budget=None) -> None:
+        super().__init__(memory_budget=memory_budget)
+        self.cache = LRUCache(cache_size)
+
+    @property
+    def hits(self) -> int:
+        return self.cache.hits
+
+    @property
+    def misses(self) -> int:
+        return self.cache.misses
+
+    def _store(self, step_index, snapshot) -> int:
+        payload = BytesIO()
+        qpy_serialization.dump(dag_to_circuit(snapshot.to_dag()), payload)
+        return self._write(step_index, payload.getvalue())
+
+    def _load(self, step_index) -> DAGCircuit:
+        circuit = self.cache.get(step_index)
+        if circuit is None:
+            circuit = qpy_serialization.load(BytesIO(self._read(step_index)))[0]
+            self.cache.put(step_index, circuit)
+            if self.memory_budget is not None and not self.RESIDENT_PAYLOADS:
+                self._trim_cache()
+
+        # the cached circuit is never handed out, its operations are copied
+        return circuit_to_dag(circuit)
+
+    def _drop(self, step_index) -> None:
+        self._remove(step_index)
+        self.cache.pop(step_index)
+
+    @property
+    def resident_nbytes(self) -> int:
+        """Estimated size of the deserialized circuits kept in the cache."""
+        return sum(
+            len(circuit.data) * _RECORD_BYTES for circuit in self.cache.values()
+        )
+
+    def _trim_cache(self):
+        # the most recently used circuit is always kept
+        while self.resident_nbytes > self.memory_budget and len(self.cache) > 1:
+            self.cache.popitem()
+
+    @abstractmethod
+    def _write(self, step_index, payload) -> int:
+        """Keeps ``payload`` for ``step_index`` and returns its size in bytes."""
+
+    @abstractmethod
+    def _read(self, step_index) -> bytes:
+        """Returns the payload kept for ``step_index``."""
+
+    @abstractmethod
+    def _remove(self, step_index) -> None:
+        """Drops the payload kept for ``step_index``."""
+
+
+class DiskSnapshotStore(SerializedSnapshotStore):
+    """Spills every snapshot to a QPY file in a session directory.
+
+    Without a ``session_dir`` a temporary directory is created, and removed
+    again once the store is garbage collected. The ``memory_budget`` bounds
+    the deserialized circuits kept in memory, snapshots on disk are never
+    dropped.
+    """
+
+    RESIDENT_PAYLOADS = False
+
+    def __init__(self, session_dir=None, cache_size=8, memory_budget=None) -> None:
+        super().__init__(cache_size=cache_size, memory_budget=memory_budget)
+
+        if session_dir is None:
+            session_dir = tempfile.mkdtemp(prefix="qiskit_trebugger_")
+            weakref.finalize(self, shutil.rmtree, session_dir, ignore_errors=True)
+        else:
+            os.makedirs(session_dir, exist_ok=True)
+
+        self.session_dir = session_dir
+
+    def _path(self, step_index):
+        return os.path.join(self.session_dir, "step_" + str(step_index) + ".qpy")
+
+    def _write(self, step_index, payload) -> int:
+        with open(self._path(step_index), "wb") as qpy_file:
+            qpy_file.write(payload)
+        return len(payload)
+
+    def _read(self, step_index) -> bytes:
+        with open(self._path(step_index), "rb") as qpy_file:
+            return qpy_file.read()
+
+    def _remove(self, step_index) -> None:
+        os.remove(self._path(step_index))
+
+
+class CompressedSnapshotStore(SerializedSnapshotStore):
+    """Keeps every snapshot in memory as compressed QPY bytes.
+
+    ``compression`` is either ``"zlib"`` or ``"lzma"``. A snapshot is only
+    decompressed when it is first accessed.
+    """
+
+    def __init__(self, compression="zlib", cache_size=8, memory_budget=None) -> None:
+        if compression not in ("zlib", "lzma"):
+            raise ValueError("compression must be either 'zlib' or 'lzma'")
+
+        super().__init__(cache_size=cache_size, memory_budget=memory_budget)
+        self.compression = compression
+        self._payloads = {}
+
+    def _write(self, step_index, payload) -> int:
+        if self.compression == "zlib":
+            payload = zlib.compress(payload)
+        else:
+            payload = lzma.compress(payload)
+
+        self._payloads[step_index] = payload
+        return len(payload)
+
+    def _read(self, step_index) -> bytes:
+        if self.compression == "zlib":
+            return zlib.decompress(self._payloads[step_index])
+        return lzma.decompress(self._payloads[step_index])
+
+    def _remove(self, step_index) -> None:
+        del self._payloads[step_index]
@@ -0,0 +1,275 @@
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from difflib import SequenceMatcher
+
+from qiskit.dagcircuit import DAGCircuit
+
+
+class BaseSnapshotStore(ABC):
+    """Bookkeeping shared by the stores of the DAG snapshots of a
+    transpilation.
+
+    A snapshot with the same fingerprint as the previous one is not stored
+    again; its step is mapped to the snapshot it repeats. With a
+    ``memory_budget`` (in bytes), the oldest snapshots are dropped once
+    ``nbytes`` exceeds it, if the store keeps them in memory. The newest
+    snapshot is always kept. ``on_discard``, if set, is called with the
+    index of every step which loses its snapshot.
+
+    Subclasses keep the snapshots by implementing ``_store``, ``_load`` and
+    ``_drop``.
+    """
+
+    # whether the stored snapshots are kept in memory, and count against
+    # the memory budget
+    RESIDENT_PAYLOADS = True
+
+    def __init__(self, memory_budget=None) -> None:
+        self.memory_budget = memory_budget
+        self.nbytes = 0
+        self.on_discard = None
+
+        # stored step index -> fingerprint
+        self._fingerprints = {}
+        # step index -> step index of the identical snapshot
+        self._aliases = {}
+        # stored step indices, in insertion order
+        self._order = []
+        # stored step index -> estimated size of its snapshot
+        self._nbytes = {}
+
+        self._last_index = None
+        self._last_fingerprint = None
+
+    def add(self, step_index, snapshot) -> None:
+        if (
+            snapshot.fingerprint is not None
+            and snapshot.fingerprint == self._last_fingerprint
+        ):
+            self._aliases[step_index] = self._last_index
+            return
+
+        nbytes = self._store(step_index, snapshot)
+        self._fingerprints[step_index] = snapshot.fingerprint
+        self._order.append(step_index)
+        self._set_nbytes(step_index, nbytes)
+
+        self._last_index = step_index
+        self._last_fingerprint = snapshot.fingerprint
+
+        if self.memory_budget is not None and self.RESIDENT_PAYLOADS:
+            while self.nbytes > self.memory_budget and len(self._order) > 1:
+                self.discard(self._order[0])
+
+    def get(self, step_index) -> DAGCircuit:
+        """Returns the DAG captured after step ``step_index``, or ``None``.
+
+        Every call returns a new DAG, which the caller may modify.
+        """
+        step_index = self._aliases.get(step_index, step_index)
+        if step_index not in self._fingerprints:
+            return None
+        return self._load(step_index)
+
+    def fingerprint(self, step_index):
+        """Returns the fingerprint of the snapshot of step ``step_index``."""
+        step_index = self._aliases.get(step_index, step_index)
+        return self._fingerprints.get(step_index)
+
+    def discard(self, step_index) -> None:
+        """Drops the snapshot of step ``step_index``, and the steps mapped to it."""
+        if step_index in self._aliases:
+            del self._aliases[step_index]
+            self._discarded([step_index])
+            return
+
+        if step_index not in self._fingerprints:
+            return
+
+        self._drop(step_index)
+        self._order.remove(step_index)
+        del self._fingerprints[step_index]
+        self.nbytes -= self._nbytes.pop(step_index)
+
+        aliases = [
+            idx for idx, target in self._aliases.items() if target == step_index
+        ]
+        for alias in aliases:
+            del self._aliases[alias]
+
+        if self._last_index == step_index:
+            self._last_index = None
+            self._last_fingerprint = None
+
+        self._discarded([step_index] + sorted(aliases))
+
+    def _discarded(self, step_indices):
+        if self.on_discard is not None:
+            for step_index in step_indices:
+                self.on_discard(step_index)
+
+    def _set_nbytes(self, step_index, nbytes):
+        self.nbytes += nbytes - self._nbytes.get(step_index, 0)
+        self._nbytes[step_index] = nbytes
+
+    @abstractmethod
+    def _store(self, step_index, snapshot) -> int:
+        """Keeps ``snapshot`` for ``step_index`` and returns its size in bytes."""
+
+    @abstractmethod
+    def _load(self, step_index) -> DAGCircuit:
+        """Returns a new DAG of the stored snapshot of ``step_index``."""
+
+    @abstractmethod
+    def _drop(self, step_index) -> None:
+        """Drops the stored snapshot of ``step_index``, before the
+        bookkeeping forgets it."""
+
+    def __contains__(self, step_index) -> bool:
+        return step_index in self._fingerprints or step_index in self._aliases
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+
+class SnapshotStore(BaseSnapshotStore):
+    """Keeps the DAG snapshots captured for the steps of a transpilation.
+
+    Every ``keyframe_interval``-th snapshot is kept in full (a keyframe). The
+    snapshots in between only keep the gate-level edit script that turns the
+    previous snapshot into them, and are rebuilt on demand. The default
+    interval of 1 keeps every snapshot in full. The ``memory_budget``
+    bounds the estimated size of the stored records.
+    """
+
+    def __init__(self, keyframe_interval=1, memory_budget=None) -> None:
+        if keyframe_interval < 1:
+            raise ValueError("keyframe_interval must be a positive integer")
+
+        super().__init__(memory_budget=memory_budget)
+        self.keyframe_interval = keyframe_interval
+
+        # step index -> DAGSnapshot, without records for delta encoded steps
+        self._snapshots = {}
+        # step index -> (base step index, edit script)
+        self._deltas = {}
+
+        self._last_records = None
+        self._since_keyframe = 0
+
+        # last reconstructed (step index, records)
+        self._rebuilt = (None, None)
+
+    def _store(self, step_index, snapshot) -> int:
+        if (
+            self._last_records is None
+            or self._since_keyframe >= self.keyframe_interval - 1
+        ):
+            self._snapshots[step_index] = snapshot
+            self._since_keyframe = 0
+        else:
+            edits = _diff_records(self._last_records, snapshot.records)
+            self._snapshots[step_index] = snapshot.with_records(None)
+            self._deltas[step_index] = (self._last_index, edits)
+            self._since_keyframe += 1
+
+        self._last_records = snapshot.records
+        return self._records_nbytes(step_index)
+
+    def _drop(self, step_index) -> None:
+        # a delta encoded snapshot based on the dropped one is turned into
+        # a keyframe first
+        pos = bisect_left(self._order, step_index)
+        if pos + 1 < len(self._order) and self._order[pos + 1] in self._deltas:
+            next_index = self._order[pos + 1]
+            records = self._get_records(next_index)
+            del self._deltas[next_index]
+            self._snapshots[next_index] = self._snapshots[next_index].with_records(
+                records
+            )
+            self._set_nbytes(next_index, self._records_nbytes(next_index))
+
+        del self._snapshots[step_index]
+        self._deltas.pop(step_index, None)
+
+        if self._rebuilt[0] == step_index:
+            self._rebuilt = (None, None)
+
+        if self._last_index == step_index:
+            self._last_records = None
+
+    def _load(self, step_index) -> DAGCircuit:
+        snapshot = self._snapshots[step_index]
+        return snapshot.with_records(self._get_records(step_index)).to_dag()
+
+    def _records_nbytes(self, step_index):
+        if step_index in self._deltas:
+            edits = self._deltas[step_index][1]
+            return len(edits) * _EDIT_BYTES + _RECORD_BYTES * sum(
+                len(inserted) for _, _, inserted in edits
+            )
+        return len(self._snapshots[step_index].records) * _RECORD_BYTES
+
+    def _get_records(self, step_index):
+        if step_index == self._last_index:
+            return self._last_records
+
+        if step_index == self._rebuilt[0]:
+            return self._rebuilt[1]
+
+        # walk back to a keyframe (or the last rebuilt step)
+        chain = []
+        idx = step_index
+        while idx in self._deltas and idx != self._rebuilt[0]:
+            base_idx, edits = self._deltas[idx]
+            chain.append(edits)
+            idx = base_idx
+
+        if idx == self._rebuilt[0]:
+            records = self._rebuilt[1]
+        else:
+            records = self._snapshots[idx].records
+
+        for edits in reversed(chain):
+            records = _patch_records(records, edits)
+
+        self._rebuilt = (step_index, records)
+        return records
+
+
+# rough sizes of a record (with its qargs and cargs tuples) and of an edit,
+# operations are shared between snapshots and not accounted for
+_RECORD_BYTES = 150
+_EDIT_BYTES = 100
+
+
+def _record_key(record):
+    # operations are shared between snapshots, so identity is enough
+    op, qargs, cargs = record
+    return (id(op), qargs, cargs)
+
+
+def _diff_records(old_records, new_records):
+    """Edit script of ``(start, stop, inserted records)`` turning old into new."""
+    matcher = SequenceMatcher(
+        None,
+        [_record_key(record) for record in old_records],
+        [_record_key(record) for record in new_records],
+        autojunk=False,
+    )
+    return tuple(
+        (i1, i2, new_records[j1:j2])
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != "equal"
+    )
+
+
+def _patch_records(records, edits):
+    patched = []
+    pos = 0
+    for start, stop, inserted in edits:
+        patched.extend(records[pos:start])
+        patched.extend(inserted)
+        pos = stop
+    patched.extend(records[pos:])
+    return tuple(patched)
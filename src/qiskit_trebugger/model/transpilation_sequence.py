@@ -1,11 +1,43 @@
+from threading import RLock
+from time import perf_counter_ns
+
+from qiskit.converters import circuit_to_dag, dag_to_circuit
+
+from .circuit_comparator import CircuitComparator
+from .circuit_diff import CircuitDiff
+from .circuit_stats import GateCountMatrix
+from .dag_snapshot import DAGSnapshotter
+from .lru_cache import LRUCache
+from .pass_type import PassType
+from .property import Property
+from .property_history import PropertyHistory
+from .snapshot_store import SnapshotStore
+
+
 class TranspilationSequence:
-    def __init__(self, on_step_callback) -> None:
+    # number of step-pair diffs kept
+    DIFF_CACHE_SIZE = 32
+
+    def __init__(self, on_step_callback, snapshots=None) -> None:
         self._original_circuit = None
+        self._original_dag = None
+        self._original_fingerprint = None
         self._general_info = {}
 
         self.on_step_callback = on_step_callback
         self.steps = []
+        self.snapshots = snapshots if snapshots is not None else SnapshotStore()
+        self.snapshots.on_discard = self._on_discard
+        self.gate_counts = GateCountMatrix()
+        self.properties = PropertyHistory()
+        self.diffs = LRUCache(self.DIFF_CACHE_SIZE)
+        # step index -> index of the step whose circuit it shows, forward
+        # filled as steps arrive (None for the original circuit)
+        self._snapshot_indices = []
         self._collected_logs = {}
+        # the snapshots and the diffs are also read by the rendering threads
+        # of the view, which may run several at once
+        self._lock = RLock()
 
     @property
     def original_circuit(self):
@@ -15,6 +47,8 @@ class TranspilationSequence:
     @original_circuit.setter
     def original_circuit(self, circuit):
         self._original_circuit = circuit
+        self._original_dag = None
+        self._original_fingerprint = None
 
     @property
     def general_info(self):
@@ -25,28 +59,164 @@ class TranspilationSequence:
     def general_info(self, info):
         self._general_info = info
 
-    def add_step(self, step) -> None:
-        if step.name in self._collected_logs:
-            step.logs = self._collected_logs[step.name]
-            self._collected_logs.pop(step.name, None)
+    def add_step(
+        self, step, snapshot=None, property_set=None, notify=True, overhead=None
+    ) -> None:
+        """Appends ``step``; ``property_set`` is the property set after it, as
+        returned by ``PropertySnapshotter.capture``. Without ``notify``,
+        ``notify`` has to be called for the step later on. The cost of storing the step
+        is added to the phases of ``overhead``, ``step.overhead`` by default.
+        """
+        if overhead is None:
+            overhead = step.overhead
 
         step.index = len(self.steps)
         self.steps.append(step)
 
-        # property set index:
-        idx = step.index
-        while len(self.steps[idx].property_set) == 0:
-            idx = idx - 1
-            if idx < 0:
-                idx = 0
-                break
-        self.steps[-1].property_set_index = idx
+        if snapshot is not None:
+            start = perf_counter_ns()
+            with self._lock:
+                self.snapshots.add(step.index, snapshot)
+            overhead["copy"] += perf_counter_ns() - start
+        self.gate_counts.add(step.index, step.circuit_stats.ops_count)
+
+        # analysis passes see the circuit of the last transformation pass:
+        if step.index in self.snapshots or step.type == PassType.TRANSFORMATION:
+            self._snapshot_indices.append(step.index)
+        elif step.index > 0:
+            self._snapshot_indices.append(self._snapshot_indices[-1])
+        else:
+            self._snapshot_indices.append(None)
 
-        # Notify:
-        self.on_step_callback(self.steps[-1])
+        if property_set is not None:
+            start = perf_counter_ns()
+            self.properties.record(step.index, property_set)
+            overhead["properties"] += perf_counter_ns() - start
+
+        # property set index, the last step which changed the property set:
+        changed_steps = self.properties.changed_steps
+        step.property_set_index = changed_steps[-1] if changed_steps else None
+
+        if notify:
+            self.notify(step)
+
+    def notify(self, step) -> None:
+        start = perf_counter_ns()
+        self.on_step_callback(step)
+        step.overhead["notify"] = perf_counter_ns() - start
 
     def add_log_entry(self, pass_name, log_entry) -> None:
         if not pass_name in self._collected_logs:
             self._collected_logs[pass_name] = []
 
         self._collected_logs[pass_name].append(log_entry)
+
+    def pop_logs(self, pass_name) -> list:
+        """Returns and forgets the log entries collected for ``pass_name``."""
+        return self._collected_logs.pop(pass_name, [])
+
+    def property_set(self, step_index) -> dict:
+        """Returns the properties after step ``step_index``, each in the state
+        set by the last step which changed the property set.
+        """
+        idx = self.steps[step_index].property_set_index
+        if idx is None:
+            return {}
+
+        diff = self.properties.diff(idx)
+        return {
+            name: Property(name, property.type, property.value, diff.get(name, ""))
+            for name, property in self.properties.properties_at(idx).items()
+        }
+
+    def get_dag(self, step_index):
+        """Returns the DAG after step ``step_index``, or ``None`` if it was not
+        captured. A ``step_index`` of ``None`` returns the original circuit,
+        whose DAG is converted once and shared: do not modify it.
+        """
+        with self._lock:
+            idx = self._snapshot_index(step_index)
+            if idx is None:
+                return self._get_original_dag()
+            return self.snapshots.get(idx)
+
+    def _get_original_dag(self):
+        if self._original_dag is None:
+            self._original_dag = circuit_to_dag(self.original_circuit)
+        return self._original_dag
+
+    def circuit_key(self, step_index):
+        """Returns the fingerprint of the circuit after step ``step_index``,
+        or ``None`` if it was not captured.
+        """
+        with self._lock:
+            idx = self._snapshot_index(step_index)
+            if idx is None:
+                if self._original_fingerprint is None:
+                    dag = self._get_original_dag()
+                    snapshot = DAGSnapshotter().capture(dag)
+                    self._original_fingerprint = snapshot.fingerprint
+                return self._original_fingerprint
+            return self.snapshots.fingerprint(idx)
+
+    def diff(self, prev_index, curr_index, backend="myers") -> CircuitDiff:
+        """Returns the ``CircuitDiff`` between the circuits after two steps.
+
+        A step index of ``None`` stands for the original circuit. Diffs are
+        cached by the keys of both circuits, so repeated calls are free.
+        Returns ``None`` if either circuit was not captured.
+        """
+        prev_key = self.circuit_key(prev_index)
+        curr_key = self.circuit_key(curr_index)
+        if prev_key is None or curr_key is None:
+            return None
+
+        key = (prev_key, curr_key, backend)
+        with self._lock:
+            diff = self.diffs.get(key)
+        if diff is None:
+            # compared outside of the lock, the circuits are copies
+            prev_circ = dag_to_circuit(self.get_dag(prev_index))
+            curr_circ = dag_to_circuit(self.get_dag(curr_index))
+
+            if prev_key == curr_key:
+                # same circuit, nothing to compare
+                diff = CircuitDiff(
+                    prev_circ,
+                    curr_circ,
+                    added=[],
+                    removed=[],
+                    retained=range(len(curr_circ.data)),
+                    layers=[],
+                )
+            else:
+                diff = CircuitComparator.diff(prev_circ, curr_circ, backend)
+            with self._lock:
+                self.diffs.put(key, diff)
+
+        return diff
+
+    def _on_discard(self, step_index):
+        # the steps showing the dropped snapshot of a step which did not
+        # transform the circuit fall back to the circuit shown before it,
+        # a transformation step shows its circuit as not captured
+        if (
+            step_index >= len(self._snapshot_indices)
+            or self.steps[step_index].type == PassType.TRANSFORMATION
+        ):
+            return
+
+        fallback = self._snapshot_indices[step_index - 1] if step_index > 0 else None
+        idx = step_index
+        while (
+            idx < len(self._snapshot_indices)
+            and self._snapshot_indices[idx] == step_index
+        ):
+            self._snapshot_indices[idx] = fallback
+            idx += 1
+
+    def _snapshot_index(self, step_index):
+        # None stands for the original circuit
+        if step_index is None:
+            return None
+        return self._snapshot_indices[step_index]
@@ -9,11 +9,20 @@ class TranspilationStep:
         self.docs = ""
         self.run_method_docs = ""
         self.duration = 0
+        # debugger's own cost per phase, in nanoseconds, spent in the
+        # transpiler callback and in the worker of an asynchronous collector
+        self.overhead = {
+            "copy": 0,
+            "properties": 0,
+            "queue": 0,
+            "stats": 0,
+            "notify": 0,
+        }
+        self.worker_overhead = {"copy": 0, "properties": 0, "stats": 0}
         self.circuit_stats = CircuitStats()
-        self.property_set = {}
+        self.unchanged = False
         self.property_set_index = None
         self.logs = []
-        self.dag = None
 
     def __repr__(self) -> str:
         return f"(name={self.name}, type={self.type})"
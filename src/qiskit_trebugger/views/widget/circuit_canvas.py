@@ -0,0 +1,327 @@
+import numpy as np
+import ipywidgets as widgets
+from IPython.display import Javascript, display
+from traitlets import Bytes, Int, List, Unicode
+
+from ...model.circuit_window import CircuitWindow
+
+
+MODULE_NAME = "qiskit_trebugger_circuit_canvas"
+MODULE_VERSION = "0.1.0"
+
+
+class CircuitCanvas(widgets.DOMWidget):
+    """Draws a circuit in the browser from a compact gate table.
+
+    Every instruction is a row of the table: its layer, the id of its gate
+    name in ``gate_names``, its qubits and its numeric parameters, the last
+    two as flat arrays indexed by offsets. The arrays are sent as binary
+    buffers. ``mask`` flags the highlighted instructions, so changing the
+    highlight only sends one byte per instruction and nothing is drawn in
+    the kernel. The view supports panning by dragging and zooming with the
+    mouse wheel.
+
+    The front-end is a requirejs module, which only the classic notebook
+    provides: ``load_frontend`` has to be called in every notebook page
+    before the first canvas is displayed. A rendered view sends a message
+    back to the handlers registered with ``on_rendered``, so callers can
+    tell whether the canvas works in the front-end and fall back otherwise.
+    """
+
+    _view_name = Unicode("CircuitCanvasView").tag(sync=True)
+    _view_module = Unicode(MODULE_NAME).tag(sync=True)
+    _view_module_version = Unicode(MODULE_VERSION).tag(sync=True)
+
+    num_qubits = Int(0).tag(sync=True)
+    depth = Int(0).tag(sync=True)
+    gate_names = List(Unicode()).tag(sync=True)
+
+    # uint32 per instruction
+    layers = Bytes(b"").tag(sync=True)
+    gate_ids = Bytes(b"").tag(sync=True)
+    # uint32 offsets, one more than instructions, into the flat arrays
+    qubit_offsets = Bytes(b"").tag(sync=True)
+    qubits = Bytes(b"").tag(sync=True)
+    param_offsets = Bytes(b"").tag(sync=True)
+    # float64, NaN for parameters which are not numbers
+    params = Bytes(b"").tag(sync=True)
+    # uint8 per instruction, 1 for highlighted instructions
+    mask = Bytes(b"").tag(sync=True)
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self._rendered_handlers = widgets.CallbackDispatcher()
+        self.on_msg(self._handle_msg)
+
+    @staticmethod
+    def load_frontend() -> None:
+        """Defines the front-end module of the widget in the notebook."""
+        display(Javascript(FRONTEND_JS))
+
+    def on_rendered(self, callback, remove=False) -> None:
+        """Registers ``callback(canvas)`` for when a view of the canvas was
+        rendered in the front-end."""
+        self._rendered_handlers.register_callback(callback, remove=remove)
+
+    def _handle_msg(self, _, content, buffers) -> None:
+        if content.get("event") == "rendered":
+            self._rendered_handlers(self)
+
+    def set_circuit(self, circuit, window=None) -> None:
+        """Sends the gate table of ``circuit``; ``window`` is its ``CircuitWindow``."""
+        if window is None:
+            window = CircuitWindow(circuit)
+        table = gate_table(circuit, window.layers)
+
+        with self.hold_sync():
+            self.num_qubits = circuit.num_qubits
+            self.depth = window.depth
+            self.gate_names = table["gate_names"]
+            self.layers = table["layers"].tobytes()
+            self.gate_ids = table["gate_ids"].tobytes()
+            self.qubit_offsets = table["qubit_offsets"].tobytes()
+            self.qubits = table["qubits"].tobytes()
+            self.param_offsets = table["param_offsets"].tobytes()
+            self.params = table["params"].tobytes()
+            self.mask = bytes(len(circuit.data))
+
+    def highlight(self, indices) -> None:
+        """Highlights the instructions at ``indices`` in the circuit data."""
+        mask = np.zeros(len(self.layers) // 4, dtype=np.uint8)
+        mask[np.asarray(indices, dtype=np.int64)] = 1
+        self.mask = mask.tobytes()
+
+
+def gate_table(circuit, layers) -> dict:
+    """Returns the gate table of ``circuit`` as little-endian NumPy arrays.
+
+    ``layers`` holds the layer of every instruction, as computed by
+    ``CircuitWindow``.
+    """
+    qubit_indices = {qubit: idx for idx, qubit in enumerate(circuit.qubits)}
+    gate_names = {}
+
+    gate_ids = []
+    qubit_offsets = [0]
+    qubits = []
+    param_offsets = [0]
+    params = []
+    for instruction, qargs, _ in circuit.data:
+        gate_ids.append(gate_names.setdefault(instruction.name, len(gate_names)))
+
+        qubits.extend(qubit_indices[qubit] for qubit in qargs)
+        qubit_offsets.append(len(qubits))
+
+        for param in instruction.params:
+            try:
+                params.append(float(param))
+            except (TypeError, ValueError):
+                params.append(np.nan)
+        param_offsets.append(len(params))
+
+    return {
+        "gate_names": list(gate_names),
+        "layers": np.array(layers, dtype="<u4"),
+        "gate_ids": np.array(gate_ids, dtype="<u4"),
+        "qubit_offsets": np.array(qubit_offsets, dtype="<u4"),
+        "qubits": np.array(qubits, dtype="<u4"),
+        "param_offsets": np.array(param_offsets, dtype="<u4"),
+        "params": np.array(params, dtype="<f8"),
+    }
+
+
+FRONTEND_JS = """
+define("%(module)s", ["@jupyter-widgets/base"], function (widgets) {
+    var CELL = 48, ROW = 40, MARGIN = 48, BOX = 32;
+
+    // binary traits arrive as DataViews, copy them to aligned typed arrays
+    function typed(view, Type) {
+        if (!view || view.byteLength === 0) return new Type(0);
+        var start = view.byteOffset;
+        return new Type(view.buffer.slice(start, start + view.byteLength));
+    }
+
+    var CircuitCanvasView = widgets.DOMWidgetView.extend({
+        render: function () {
+            this.el.classList.add("circuit-canvas");
+            this.canvas = document.createElement("canvas");
+            this.el.appendChild(this.canvas);
+            this.scale = 1;
+            this.offsetX = 0;
+            this.offsetY = 0;
+
+            this.load();
+            this.send({ event: "rendered" });
+            this.listenTo(this.model, "change:mask", this.draw);
+            this.listenTo(this.model, "change:layers change:qubits change:params", this.reload);
+
+            var view = this;
+            this.canvas.addEventListener("wheel", function (event) {
+                event.preventDefault();
+                var rect = view.canvas.getBoundingClientRect();
+                var x = event.clientX - rect.left, y = event.clientY - rect.top;
+                var scale = Math.min(4, Math.max(0.05, view.scale * Math.exp(-event.deltaY * 0.002)));
+                view.offsetX = x - (x - view.offsetX) * scale / view.scale;
+                view.offsetY = y - (y - view.offsetY) * scale / view.scale;
+                view.scale = scale;
+                view.draw();
+            });
+            this.canvas.addEventListener("mousedown", function (event) {
+                var lastX = event.clientX, lastY = event.clientY;
+                function move(event) {
+                    view.offsetX += event.clientX - lastX;
+                    view.offsetY += event.clientY - lastY;
+                    lastX = event.clientX;
+                    lastY = event.clientY;
+                    view.draw();
+                }
+                function up() {
+                    window.removeEventListener("mousemove", move);
+                    window.removeEventListener("mouseup", up);
+                }
+                window.addEventListener("mousemove", move);
+                window.addEventListener("mouseup", up);
+            });
+            this.canvas.addEventListener("dblclick", function () {
+                view.scale = 1;
+                view.offsetX = 0;
+                view.offsetY = 0;
+                view.draw();
+            });
+
+            if (window.ResizeObserver) {
+                new ResizeObserver(function () { view.draw(); }).observe(this.el);
+            }
+            this.displayed.then(function () { view.draw(); });
+        },
+
+        load: function () {
+            var model = this.model;
+            this.layers = typed(model.get("layers"), Uint32Array);
+            this.gateIds = typed(model.get("gate_ids"), Uint32Array);
+            this.qubitOffsets = typed(model.get("qubit_offsets"), Uint32Array);
+            this.qubits = typed(model.get("qubits"), Uint32Array);
+            this.paramOffsets = typed(model.get("param_offsets"), Uint32Array);
+            this.params = typed(model.get("params"), Float64Array);
+        },
+
+        reload: function () {
+            this.load();
+            this.draw();
+        },
+
+        draw: function () {
+            var numQubits = this.model.get("num_qubits");
+            var width = this.el.clientWidth;
+            var height = Math.min(450, ROW * numQubits + ROW);
+            if (width === 0) return;
+
+            var ratio = window.devicePixelRatio || 1;
+            this.canvas.style.width = width + "px";
+            this.canvas.style.height = height + "px";
+            this.canvas.width = width * ratio;
+            this.canvas.height = height * ratio;
+
+            var ctx = this.canvas.getContext("2d");
+            var names = this.model.get("gate_names");
+            var mask = typed(this.model.get("mask"), Uint8Array);
+            var scale = this.scale;
+
+            ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+            ctx.clearRect(0, 0, width, height);
+            ctx.translate(this.offsetX, this.offsetY);
+            ctx.scale(scale, scale);
+
+            // only the layers and qubits in view are drawn
+            var firstLayer = Math.floor((-this.offsetX / scale - MARGIN) / CELL) - 1;
+            var lastLayer = Math.ceil((width - this.offsetX) / scale / CELL) + 1;
+            var firstQubit = Math.floor(-this.offsetY / scale / ROW) - 1;
+            var lastQubit = Math.ceil((height - this.offsetY) / scale / ROW) + 1;
+            var wireEnd = MARGIN + CELL * this.model.get("depth");
+
+            ctx.strokeStyle = "#000";
+            ctx.lineWidth = 1;
+            for (var q = Math.max(0, firstQubit); q < Math.min(numQubits, lastQubit); q++) {
+                ctx.beginPath();
+                ctx.moveTo(MARGIN / 2, ROW * q + ROW);
+                ctx.lineTo(wireEnd, ROW * q + ROW);
+                ctx.stroke();
+            }
+
+            ctx.textAlign = "center";
+            ctx.textBaseline = "middle";
+            for (var i = 0; i < this.layers.length; i++) {
+                var layer = this.layers[i];
+                if (layer < firstLayer || layer > lastLayer) continue;
+
+                var qubits = this.qubits.subarray(this.qubitOffsets[i], this.qubitOffsets[i + 1]);
+                if (qubits.length === 0) continue;
+                var top = Math.min.apply(null, qubits), bottom = Math.max.apply(null, qubits);
+                if (bottom < firstQubit || top > lastQubit) continue;
+
+                var name = names[this.gateIds[i]];
+                var x = MARGIN + CELL * layer + CELL / 2;
+                var color = mask[i] ? "orange" : "#bb8bff";
+
+                if (name === "barrier") {
+                    ctx.setLineDash([4, 4]);
+                    ctx.strokeStyle = "#888";
+                    ctx.beginPath();
+                    ctx.moveTo(x, ROW * top + ROW / 2);
+                    ctx.lineTo(x, ROW * bottom + ROW * 1.5);
+                    ctx.stroke();
+                    ctx.setLineDash([]);
+                    continue;
+                }
+
+                // the gate box sits on the last qubit, the others get a dot
+                var target = qubits[qubits.length - 1];
+                ctx.strokeStyle = color;
+                ctx.fillStyle = color;
+                if (qubits.length > 1) {
+                    ctx.lineWidth = 2;
+                    ctx.beginPath();
+                    ctx.moveTo(x, ROW * top + ROW);
+                    ctx.lineTo(x, ROW * bottom + ROW);
+                    ctx.stroke();
+                    ctx.lineWidth = 1;
+                    for (var k = 0; k < qubits.length - 1; k++) {
+                        ctx.beginPath();
+                        ctx.arc(x, ROW * qubits[k] + ROW, 5, 0, 2 * Math.PI);
+                        ctx.fill();
+                    }
+                }
+                ctx.fillRect(x - BOX / 2, ROW * target + ROW - BOX / 2, BOX, BOX);
+
+                ctx.fillStyle = "#000";
+                ctx.font = "11px monospace";
+                ctx.fillText(name.length > 5 ? name.slice(0, 4) + "…" : name, x, ROW * target + ROW - 5);
+
+                var params = this.params.subarray(this.paramOffsets[i], this.paramOffsets[i + 1]);
+                if (params.length > 0 && scale > 0.6) {
+                    var text = Array.prototype.map.call(params, function (p) {
+                        return isNaN(p) ? "θ" : p.toPrecision(2);
+                    }).join(",");
+                    ctx.font = "8px monospace";
+                    ctx.fillText(text.length > 8 ? text.slice(0, 7) + "…" : text, x, ROW * target + ROW + 8);
+                }
+            }
+
+            // qubit labels stay on the left edge
+            ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+            ctx.fillStyle = "#fff";
+            ctx.fillRect(0, 0, MARGIN / 2 + 4, height);
+            ctx.fillStyle = "#000";
+            ctx.font = "11px monospace";
+            ctx.textAlign = "left";
+            for (var q = Math.max(0, firstQubit); q < Math.min(numQubits, lastQubit); q++) {
+                ctx.fillText("q" + q, 2, (ROW * q + ROW) * scale + this.offsetY);
+            }
+        }
+    });
+
+    return { CircuitCanvasView: CircuitCanvasView };
+});
+""" % {
+    "module": MODULE_NAME
+}
@@ -0,0 +1,198 @@
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from multiprocessing import get_context
+
+from qiskit import QuantumCircuit, user_config
+from qiskit.circuit import qpy_serialization
+
+# the highlighted draw uses internals of the matplotlib drawer, other
+# releases fall back to drawing the circuit without the highlight
+try:
+    from qiskit.visualization.circuit import _utils as _draw_utils
+    from qiskit.visualization.circuit.matplotlib import MatplotlibDrawer
+except ImportError:  # qiskit-terra < 0.22
+    try:
+        from qiskit.visualization import utils as _draw_utils
+        from qiskit.visualization.matplotlib import MatplotlibDrawer
+    except ImportError:
+        _draw_utils = MatplotlibDrawer = None
+
+from ...model.circuit_diff import CircuitDiff
+
+
+class _HighlightDrawer(MatplotlibDrawer or object):
+    """Matplotlib drawer painting the nodes in ``highlight`` in the
+    ``CircuitDiff.HIGHLIGHT_COLORS``, so the instructions keep their names."""
+
+    def __init__(self, *args, highlight=(), **kwargs) -> None:
+        self._highlight = {id(node) for node in highlight}
+        super().__init__(*args, **kwargs)
+
+    def _get_colors(self, node):
+        super()._get_colors(node)
+        if id(node) in self._highlight:
+            face, text = CircuitDiff.HIGHLIGHT_COLORS
+            colors = self._data[node]
+            colors["fc"] = colors["ec"] = colors["lc"] = face
+            colors["gt"] = colors["sc"] = text
+
+
+def _highlighted_nodes(circuit, indices, qubits, nodes) -> list:
+    # the drawer lays out copies of the instructions, in layers that keep
+    # the order on every qubit: the k-th node on its first qubit is the
+    # k-th instruction on it in ``circuit.data`` that is drawn at all
+    drawn = set(qubits)
+    wire_indices = {}
+    for idx, (_, qargs, _) in enumerate(circuit.data):
+        if qargs and any(qarg in drawn for qarg in qargs):
+            wire_indices.setdefault(qargs[0], []).append(idx)
+
+    indices = set(int(idx) for idx in indices)
+    counts = {}
+    highlighted = []
+    for layer in nodes:
+        for node in layer:
+            if not node.qargs:
+                continue
+            count = counts.get(node.qargs[0], 0)
+            counts[node.qargs[0]] = count + 1
+            if wire_indices[node.qargs[0]][count] in indices:
+                highlighted.append(node)
+    return highlighted
+
+
+def _draw_highlighted(circuit, highlight, draw_options):
+    # the steps of ``circuit.draw("mpl")``, with a drawer that colours the
+    # nodes of the highlighted instructions
+    options = dict(draw_options)
+    reverse_bits = options.pop("reverse_bits", False)
+    qubits, clbits, nodes = _draw_utils._get_layered_instructions(
+        circuit,
+        reverse_bits=reverse_bits,
+        justify=options.pop("justify", None),
+        idle_wires=options.pop("idle_wires", True),
+    )
+
+    drawer = _HighlightDrawer(
+        qubits,
+        clbits,
+        nodes,
+        reverse_bits=reverse_bits,
+        circuit=circuit,
+        highlight=_highlighted_nodes(circuit, highlight, qubits, nodes),
+        **options,
+    )
+    return drawer.draw()
+
+
+def draw_style(draw_options):
+    """Returns the style the matplotlib drawer uses with ``draw_options``.
+
+    Without a ``style`` option the drawer takes the one set in the Qiskit
+    user config, so the images depend on it as well.
+    """
+    style = draw_options.get("style")
+    if style is None:
+        config = user_config.get_config()
+        style = (
+            config.get("circuit_mpl_style"),
+            config.get("circuit_mpl_style_path"),
+        )
+    return style
+
+
+def draw_circuit(circuit, highlight, draw_options, image_format="png") -> bytes:
+    """Draws ``circuit`` with matplotlib and returns the image bytes.
+
+    ``highlight`` holds the indices of the instructions to highlight, or
+    ``None``; with a qiskit-terra release whose drawer can not highlight,
+    the circuit is drawn without it. ``image_format`` is either ``"png"``
+    or ``"svg"``.
+    """
+    import matplotlib.pyplot as plt
+
+    fig = None
+    if highlight is not None and len(highlight) > 0 and MatplotlibDrawer is not None:
+        figures = set(plt.get_fignums())
+        try:
+            fig = _draw_highlighted(circuit, highlight, draw_options)
+        except Exception:  # pylint: disable=broad-except
+            # the drawer internals changed, draw without the highlight
+            for number in set(plt.get_fignums()) - figures:
+                plt.close(number)
+    if fig is None:
+        fig = circuit.draw("mpl", **draw_options)
+    try:
+        image = BytesIO()
+        fig.savefig(image, format=image_format, bbox_inches="tight")
+        return image.getvalue()
+    finally:
+        plt.close(fig)
+
+
+def _draw_serialized(payload, highlight, draw_options, image_format) -> bytes:
+    circuit = qpy_serialization.load(BytesIO(payload))[0]
+    return draw_circuit(circuit, highlight, draw_options, image_format)
+
+
+def _init_worker() -> None:
+    # load matplotlib, its fonts and the drawer once per worker
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+    circuit = QuantumCircuit(1)
+    circuit.h(0)
+    draw_circuit(circuit, None, {})
+
+
+class InlineRenderer:
+    """Draws circuits in the kernel process, one at a time."""
+
+    max_workers = 1
+
+    def render(self, circuit, highlight, draw_options, image_format="png") -> bytes:
+        return draw_circuit(circuit, highlight, draw_options, image_format)
+
+
+class ProcessRenderer:
+    """Draws circuits in a pool of worker processes.
+
+    Circuits are sent to the workers as QPY bytes and the images are sent
+    back, so several circuits can be drawn in parallel and matplotlib
+    figures never live in the kernel process. The workers are started once
+    and kept until the renderer is garbage collected.
+    """
+
+    def __init__(self, max_workers=None) -> None:
+        if max_workers is None:
+            max_workers = min(4, os.cpu_count() or 1)
+
+        self.max_workers = max_workers
+        # spawned workers do not inherit the threads and the state of the
+        # kernel, which forking them would copy in an inconsistent state
+        self._executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+        )
+        weakref.finalize(self, self._executor.shutdown, wait=False)
+
+    def render(self, circuit, highlight, draw_options, image_format="png") -> bytes:
+        payload = BytesIO()
+        qpy_serialization.dump(circuit, payload)
+        if highlight is not None:
+            highlight = list(highlight)
+
+        return self._executor.submit(
+            _draw_serialized,
+            payload.getvalue(),
+            highlight,
+            draw_options,
+            image_format,
+        ).result()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,189 @@
+from collections import defaultdict
+from html import escape
+
+import ipywidgets as widgets
+from IPython.display import Javascript, display
+from traitlets import Unicode
+
+
+MODULE_NAME = "qiskit_trebugger_property_table"
+MODULE_VERSION = "0.1.0"
+
+
+class PropertyTable(widgets.VBox):
+    """Shows a property set as a single HTML table, with stock widgets.
+
+    The whole table is one ``HTML`` widget, whatever the number of
+    properties. The values which are not shown in the table are picked in
+    a single dropdown below it, whose button passes the picked property to
+    the handlers registered with ``on_click``.
+    """
+
+    def __init__(self, value=None, **kwargs) -> None:
+        # passed to the click handlers like ButtonWithValue
+        self.value = value
+        self._click_handlers = widgets.CallbackDispatcher()
+
+        self._table = widgets.HTML("")
+        self._names = widgets.Dropdown(options=[], layout={"width": "auto"})
+        show_button = widgets.Button(
+            description="Show", icon="search", layout={"width": "auto"}
+        )
+        show_button.on_click(self._on_show)
+        self._picker = widgets.HBox(
+            [self._names, show_button], layout={"display": "none"}
+        )
+        self._picker.add_class("property-picker")
+
+        super().__init__([self._table, self._picker], **kwargs)
+
+    @property
+    def html(self) -> str:
+        return self._table.value
+
+    def set_properties(self, property_set, show_state=True) -> None:
+        names = [
+            name
+            for name, property in property_set.items()
+            if not _shown_inline(property)
+        ]
+        self._table.value = property_table_html(
+            property_set, show_state, buttons=False
+        )
+        self._names.options = names
+        self._picker.layout.display = None if names else "none"
+
+    def on_click(self, callback, remove=False) -> None:
+        """Registers ``callback(table, property_name)`` for the picked values."""
+        self._click_handlers.register_callback(callback, remove=remove)
+
+    def _on_show(self, _) -> None:
+        if self._names.value is not None:
+            self._click_handlers(self, self._names.value)
+
+
+class FrontendPropertyTable(widgets.DOMWidget):
+    """Shows a property set as a single HTML table with a button per value.
+
+    The whole table is sent in one message, whatever the number of
+    properties. A single listener in the browser handles the clicks on the
+    buttons of all the rows and sends the name of the clicked property back
+    to the handlers registered with ``on_click``.
+
+    The front-end is a requirejs module, which only the classic notebook
+    provides: ``load_frontend`` has to be called in every notebook page
+    before the first table is displayed. ``PropertyTable`` works everywhere.
+    """
+
+    _view_name = Unicode("PropertyTableView").tag(sync=True)
+    _view_module = Unicode(MODULE_NAME).tag(sync=True)
+    _view_module_version = Unicode(MODULE_VERSION).tag(sync=True)
+
+    html = Unicode("").tag(sync=True)
+    # not synced, passed to the click handlers like ButtonWithValue
+    value = Unicode(None, allow_none=True)
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self._click_handlers = widgets.CallbackDispatcher()
+        self.on_msg(self._handle_msg)
+
+    @staticmethod
+    def load_frontend() -> None:
+        """Defines the front-end module of the widget in the notebook."""
+        display(Javascript(FRONTEND_JS))
+
+    def set_properties(self, property_set, show_state=True) -> None:
+        self.html = property_table_html(property_set, show_state)
+
+    def on_click(self, callback, remove=False) -> None:
+        """Registers ``callback(table, property_name)`` for clicks on a row."""
+        self._click_handlers.register_callback(callback, remove=remove)
+
+    def _handle_msg(self, _, content, buffers) -> None:
+        if content.get("event") == "click":
+            self._click_handlers(self, content["property"])
+
+
+def _shown_inline(property) -> bool:
+    return property.type in (int, float, bool, str)
+
+
+def property_table_html(property_set, show_state=True, buttons=True) -> str:
+    """Returns the rows of ``property_set`` as HTML.
+
+    Values of types other than ``int``, ``float``, ``bool`` and ``str`` are
+    only named, with ``buttons`` they get a button to show them. With
+    ``show_state`` the rows are marked with the state of their property.
+    """
+    rows = []
+    for prop_name, property in property_set.items():
+        name_class = value_class = ""
+        if show_state:
+            value_class = " " + property.state
+            if property.state != "updated":
+                name_class = value_class
+
+        if not _shown_inline(property):
+            txt = (
+                "(dict)"
+                if type(property.value) == defaultdict
+                else "(" + property.type.__name__ + ")"
+            )
+            value = "<span>" + txt + "</span>"
+            if buttons:
+                value += (
+                    '<button class="property-button" data-property="'
+                    + escape(prop_name)
+                    + '">...</button>'
+                )
+        else:
+            value = escape(str(property.value))
+
+        rows.append(
+            '<div class="property-name'
+            + name_class
+            + '">'
+            + escape(property.name)
+            + '</div><div class="property-value'
+            + value_class
+            + '">'
+            + value
+            + "</div>"
+        )
+
+    return '<div class="property-table">' + "".join(rows) + "</div>"
+
+
+FRONTEND_JS = """
+define("%(module)s", ["@jupyter-widgets/base"], function (widgets) {
+    var PropertyTableView = widgets.DOMWidgetView.extend({
+        render: function () {
+            var view = this;
+            this.el.classList.add("property-table-wpr");
+
+            // one listener for the buttons of all the rows
+            this.el.addEventListener("click", function (event) {
+                var button = event.target.closest("[data-property]");
+                if (button && view.el.contains(button)) {
+                    view.send({
+                        event: "click",
+                        property: button.getAttribute("data-property")
+                    });
+                }
+            });
+
+            this.listenTo(this.model, "change:html", this.update);
+            this.update();
+        },
+
+        update: function () {
+            this.el.innerHTML = this.model.get("html");
+        }
+    });
+
+    return { PropertyTableView: PropertyTableView };
+});
+""" % {
+    "module": MODULE_NAME
+}
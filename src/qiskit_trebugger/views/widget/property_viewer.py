@@ -0,0 +1,173 @@
+from collections import defaultdict
+from html import escape
+
+import ipywidgets as widgets
+from qiskit.dagcircuit import DAGInNode, DAGOpNode
+
+from .button_with_value import ButtonWithValue
+from ...model.lru_cache import LRUCache
+
+
+class PropertyViewer(widgets.VBox):
+    """Shows the value of a property one page at a time.
+
+    Lists and dicts are split in pages of ``PAGE_SIZE`` items; a page is
+    only turned into HTML when it is first shown and the most recently
+    shown pages are cached. Other values are shown on a single page.
+    """
+
+    PAGE_SIZE = 100
+    PAGE_CACHE_SIZE = 8
+
+    def __init__(self, property, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.property = property
+        self.page = 0
+        self.pages = LRUCache(self.PAGE_CACHE_SIZE)
+
+        if isinstance(property.value, dict):
+            # dicts are indexed through their items, listed once
+            self._items = list(property.value.items())
+        elif isinstance(property.value, list):
+            self._items = property.value
+        else:
+            self._items = None
+
+        self.num_pages = (
+            1
+            if self._items is None
+            else max(1, -(-len(self._items) // self.PAGE_SIZE))
+        )
+
+        self._content = widgets.HTML("", layout={"width": "100%"})
+        self._label = widgets.Label("")
+        buttons = []
+        for action, icon, tooltip in (
+            ("prev", "angle-left", "Previous items"),
+            ("next", "angle-right", "Next items"),
+        ):
+            button = ButtonWithValue(
+                value=action,
+                description="",
+                icon=icon,
+                tooltip=tooltip,
+                layout={"width": "32px"},
+            )
+            button.on_click(self.on_page)
+            buttons.append(button)
+
+        pager = widgets.HBox([buttons[0], self._label, buttons[1]])
+        pager.add_class("window-pager")
+        if self.num_pages == 1:
+            pager.layout.display = "none"
+
+        self.children = (pager, self._content)
+        self.show_page(0)
+
+    def show_page(self, page) -> None:
+        self.page = min(max(page, 0), self.num_pages - 1)
+
+        html_str = self.pages.get(self.page)
+        if html_str is None:
+            html_str = self._render_page(self.page)
+            self.pages.put(self.page, html_str)
+        self._content.value = html_str
+
+        if self._items is not None and len(self._items) > 0:
+            start = self.page * self.PAGE_SIZE
+            self._label.value = (
+                "Items "
+                + str(start)
+                + "-"
+                + str(min(start + self.PAGE_SIZE, len(self._items)) - 1)
+                + " of "
+                + str(len(self._items))
+            )
+
+    def on_page(self, btn) -> None:
+        self.show_page(self.page + (1 if btn.value == "next" else -1))
+
+    def _render_page(self, page):
+        property = self.property
+        html_str = (
+            '<table style="width: 100%"><thead><tr><th colspan="'
+            + ("2" if type(property.value) == defaultdict else "1")
+            + '">'
+            + escape(property.name)
+            + "</th></tr></thead>"
+        )
+
+        if self._items is None:
+            rows = ["<tr><td><pre>" + escape(str(property.value)) + "</pre></td></tr>"]
+        else:
+            start = page * self.PAGE_SIZE
+            items = self._items[start : start + self.PAGE_SIZE]
+            if property.name == "block_list":
+                rows = [_block_list_row(v) for v in items]
+            elif property.name == "commutation_set":
+                rows = [_commutation_set_row(key, v) for key, v in items]
+            elif isinstance(property.value, dict):
+                rows = [
+                    '<tr><td style="width:50%">'
+                    + escape(str(key))
+                    + "</td><td><pre>"
+                    + escape(str(v))
+                    + "</pre></td></tr>"
+                    for key, v in items
+                ]
+            else:
+                rows = [
+                    "<tr><td><pre>" + escape(str(v)) + "</pre></td></tr>"
+                    for v in items
+                ]
+
+        return html_str + "".join(rows) + "</table>"
+
+
+def _bit_html(bit):
+    return bit.register.name + "<small>[" + str(bit.index) + "]</small>"
+
+
+def _op_html(node):
+    qargs = ", ".join([_bit_html(qarg) for qarg in node.qargs])
+    return (
+        "<strong>" + (node.name if node.name != None else "") + "</strong>"
+        "(" + qargs + ")"
+    )
+
+
+def _block_list_row(block):
+    return "<tr><td>" + " - ".join([_op_html(node) for node in block]) + "</td></tr>"
+
+
+def _commutation_set_row(key, v):
+    if type(key) is tuple:
+        key_str = "(" + _op_html(key[0]) + ", " + _bit_html(key[1]) + ")"
+    else:
+        key_str = _bit_html(key)
+
+    value_str = ""
+    if type(v) is list:
+        value_str = value_str + "["
+        for nodes in v:
+            if type(nodes) is list:
+                nodes_arr = []
+                for node in nodes:
+                    if isinstance(node, DAGOpNode):
+                        nodes_arr.append(_op_html(node))
+                    else:
+                        node_type = "IN" if isinstance(node, DAGInNode) else "OUT"
+                        nodes_arr.append(
+                            node_type + "(wire=" + _bit_html(node.wire) + ")"
+                        )
+
+                value_str = value_str + "[" + (", ".join(nodes_arr)) + "]<br>"
+        value_str = value_str + "]"
+
+    return (
+        '<tr><td style="width:50%">'
+        + key_str
+        + "</td><td><pre>"
+        + value_str
+        + "</pre></td></tr>"
+    )
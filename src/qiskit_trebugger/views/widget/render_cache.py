@@ -0,0 +1,94 @@
+import hashlib
+import os
+import tempfile
+from functools import lru_cache
+from threading import Lock
+
+from ...model.lru_cache import LRUCache
+
+
+class RenderCache:
+    """Content-addressed cache of rendered circuit images.
+
+    Images are PNG bytes stored under a key built by ``make_key`` from
+    everything the image depends on, so identical circuits drawn the same
+    way share an image. The ``maxsize`` most recently used images are kept
+    in memory; with a ``cache_dir`` every image is also written there and
+    survives the session. The cache can be shared by rendering threads.
+    """
+
+    # bumped when the images or their keys change, so that images stored
+    # on disk by an older version are not served
+    FORMAT_VERSION = 1
+
+    def __init__(self, maxsize=32, cache_dir=None) -> None:
+        self.memory = LRUCache(maxsize)
+        self.cache_dir = cache_dir
+        self.disk_hits = 0
+        self._lock = Lock()
+
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Hashes the ``repr`` of ``parts``, bytes are hashed as they are.
+
+        The key also covers ``FORMAT_VERSION`` and the versions of Qiskit
+        and matplotlib, which draw the images.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (RenderCache.FORMAT_VERSION, _drawer_versions()) + parts:
+            digest.update(part if isinstance(part, bytes) else repr(part).encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key) -> bytes:
+        """Returns the image stored under ``key``, or ``None``."""
+        with self._lock:
+            image = self.memory.get(key)
+        if image is not None or self.cache_dir is None:
+            return image
+
+        try:
+            with open(self._path(key), "rb") as image_file:
+                image = image_file.read()
+        except OSError:
+            return None
+
+        with self._lock:
+            self.disk_hits += 1
+            self.memory.put(key, image)
+        return image
+
+    def put(self, key, image) -> None:
+        with self._lock:
+            self.memory.put(key, image)
+        if self.cache_dir is None:
+            return
+
+        # write to a temporary file first, so readers never see a partial image
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as image_file:
+            image_file.write(image)
+        os.replace(tmp_path, self._path(key))
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".png")
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            if key in self.memory:
+                return True
+        return self.cache_dir is not None and os.path.exists(self._path(key))
+
+    def __repr__(self) -> str:
+        return f"RenderCache(memory={self.memory!r}, cache_dir={self.cache_dir!r}, disk_hits={self.disk_hits})"
+
+
+@lru_cache(maxsize=None)
+def _drawer_versions():
+    import matplotlib
+    import qiskit
+
+    return (qiskit.__version__, matplotlib.__version__)
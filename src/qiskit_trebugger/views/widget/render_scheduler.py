@@ -0,0 +1,54 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+
+class RenderScheduler:
+    """Runs the rendering jobs of the timeline view in a worker pool.
+
+    Jobs are identified by a key: submitting a key that is still pending
+    returns the pending job instead of running it twice. ``cancel_stale``
+    drops the pending jobs the view no longer needs, jobs already running
+    are left to finish.
+    """
+
+    def __init__(self, max_workers=1) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="trebugger-render"
+        )
+        self._jobs = {}
+        self._lock = Lock()
+
+    def submit(self, key, fn, *args, callback=None):
+        """Runs ``fn(*args)`` and calls ``callback(future)`` once it is done."""
+        with self._lock:
+            future = self._jobs.get(key)
+            submitted = future is None or future.done()
+            if submitted:
+                future = self._executor.submit(fn, *args)
+                self._jobs[key] = future
+
+        # outside of the lock: the callback runs right away if the job is done
+        if submitted:
+            future.add_done_callback(lambda done: self._forget(key, done))
+
+        if callback is not None:
+            future.add_done_callback(callback)
+        return future
+
+    def cancel_stale(self, is_stale) -> None:
+        """Cancels the pending jobs whose key satisfies ``is_stale(key)``."""
+        with self._lock:
+            stale = [future for key, future in self._jobs.items() if is_stale(key)]
+
+        # cancelled jobs are forgotten by their done callback
+        for future in stale:
+            future.cancel()
+
+    def shutdown(self) -> None:
+        self.cancel_stale(lambda key: True)
+        self._executor.shutdown(wait=False)
+
+    def _forget(self, key, future) -> None:
+        with self._lock:
+            if self._jobs.get(key) is future:
+                del self._jobs[key]
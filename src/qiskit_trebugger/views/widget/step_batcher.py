@@ -0,0 +1,49 @@
+from threading import Lock
+from time import monotonic
+
+
+class StepBatcher:
+    """Buffers the steps of a transpilation and hands them to the view in
+    batches.
+
+    A batch is flushed once ``max_steps`` steps are buffered or once
+    ``max_delay`` seconds have passed since the previous flush, so fast
+    passes do not wait for the front-end. Batches are flushed by ``add``,
+    on the thread notifying the steps, so the view is only updated from
+    there: the steps buffered when a long pass starts reach the view once
+    it is done. ``flush`` sends the remaining steps and has to be called
+    once the transpilation is over.
+    """
+
+    def __init__(self, on_steps, max_steps=32, max_delay=0.25) -> None:
+        self.on_steps = on_steps
+        self.max_steps = max_steps
+        self.max_delay = max_delay
+
+        self._steps = []
+        self._last_flush = monotonic()
+        # held while the view is updated, so batches arrive in order
+        self._lock = Lock()
+
+    def add(self, step) -> None:
+        with self._lock:
+            self._steps.append(step)
+            if (
+                len(self._steps) >= self.max_steps
+                or monotonic() - self._last_flush >= self.max_delay
+            ):
+                self._flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        steps = self._steps
+        self._steps = []
+        self._last_flush = monotonic()
+        if steps:
+            self.on_steps(steps)
+
+    def __len__(self) -> int:
+        return len(self._steps)
@@ -1,21 +1,45 @@
 from numpy import disp
-from qiskit.converters import dag_to_circuit, circuit_to_dag
+import numpy as np
+from qiskit.converters import dag_to_circuit
 from qiskit.dagcircuit import DAGCircuit
 
-from collections import defaultdict
-from threading import Thread
 from datetime import datetime
 import html
+from threading import Lock
 import ipywidgets as widgets
 from IPython.display import HTML
 
 from .button_with_value import ButtonWithValue
+from .circuit_canvas import CircuitCanvas
+from .circuit_renderer import InlineRenderer, draw_style
+from .property_table import FrontendPropertyTable, PropertyTable
+from .property_viewer import PropertyViewer
+from .render_cache import RenderCache
+from .render_scheduler import RenderScheduler
 from ...model.pass_type import PassType
 from ...model.circuit_stats import CircuitStats
-from ...model.circuit_comparator import CircuitComparator
+from ...model.circuit_diff import CircuitDiff
+from ...model.circuit_window import CircuitWindow
+from ...model.lru_cache import LRUCache
 
 
 class TimelineView(widgets.VBox):
+    # size of the window of a circuit rendered at once
+    WINDOW_LAYERS = 60
+    WINDOW_QUBITS = 32
+    # rows of the timeline materialized at once
+    TIMELINE_ROWS = 50
+    # steps on each side of an expanded step that are rendered ahead
+    PREFETCH_STEPS = 1
+    # steps on each side of a step offered as the base of its diff
+    DIFF_BASE_STEPS = 5
+    # number of rendered circuit images kept in memory
+    RENDER_CACHE_SIZE = 32
+    # number of step circuits kept for paging, rendering and exports
+    CIRCUIT_CACHE_SIZE = 8
+    # how circuits are drawn, part of the key of the rendered images
+    DRAW_OPTIONS = {"idle_wires": False, "with_layout": False, "scale": 0.9, "fold": 20}
+
     def __init__(self, *args, **kwargs):
         self.layouts = {
             "timeline": {
@@ -71,9 +95,18 @@ class TimelineView(widgets.VBox):
 
         params_panel = widgets.VBox([param_button], layout=dict(margin="0 1% 0 1%"))
 
+        # a pool of at most TIMELINE_ROWS rows shows a page of the steps,
+        # rows are bound to other steps when paging instead of recreated
         self.timeline_panel = widgets.VBox([], layout={"width": "100%"})
+        self.timeline_pager = self._get_timeline_pager()
         timeline_wpr = widgets.Box(
-            [self.timeline_panel], layout=self.layouts["timeline"]
+            [
+                widgets.VBox(
+                    [self.timeline_pager, self.timeline_panel],
+                    layout={"width": "100%"},
+                )
+            ],
+            layout=self.layouts["timeline"],
         )
 
         stats_title = widgets.Label("Circuit Stats")
@@ -133,6 +166,54 @@ class TimelineView(widgets.VBox):
 
         self._transpilation_sequence = None
 
+        # step index -> view state of its circuit tab: the position of
+        # its window, the diff options and widgets, created by the loading
+        # jobs under _windows_lock. The circuits themselves are kept in the
+        # bounded _circuits and rebuilt from the snapshot store when evicted
+        self._windows = {}
+        self._windows_lock = Lock()
+        self._circuits = LRUCache(self.CIRCUIT_CACHE_SIZE)
+        # step index -> generation of its panel, results of the background
+        # jobs of an older generation are not shown
+        self._generations = {}
+
+        # pooled timeline rows, bound to the steps from _first_row on
+        self._rows = []
+        self._first_row = 0
+        # step index -> details panel, created when a step is first expanded
+        self._details_panels = {}
+
+        # "image" renders circuits in the kernel, "canvas" sends their gate
+        # table to a CircuitCanvas drawing them in the browser. The canvas
+        # needs the classic notebook: images are shown until a canvas was
+        # rendered by the front-end
+        self.circuit_view = "image"
+        self._canvas_rendered = False
+        # "widgets" shows property sets with stock widgets, "frontend" with
+        # a FrontendPropertyTable, which needs the classic notebook
+        self.property_view = "widgets"
+        self._renderer = InlineRenderer()
+        self._scheduler = RenderScheduler(self._renderer.max_workers)
+        self.render_cache = RenderCache(self.RENDER_CACHE_SIZE)
+
+    @property
+    def renderer(self):
+        """Returns the renderer drawing the circuits"""
+        return self._renderer
+
+    @renderer.setter
+    def renderer(self, renderer):
+        # run as many rendering jobs at once as the renderer can draw,
+        # in-process matplotlib is not thread-safe and draws one at a time
+        self._scheduler.shutdown()
+        self._renderer = renderer
+        self._scheduler = RenderScheduler(renderer.max_workers)
+
+    def close(self):
+        # pending rendering jobs are dropped with the view
+        self._scheduler.shutdown()
+        super().close()
+
     @property
     def transpilation_sequence(self):
         """Returns the transpilation_sequence object"""
@@ -240,6 +321,57 @@ class TimelineView(widgets.VBox):
             + "</p>"
         )
 
+        # debugger's own cost per phase, in the transpiler callback and
+        # off the critical path, in the worker of an asynchronous collector
+        overhead = {}
+        worker_overhead = {}
+        passes_duration = 0
+        for step in self.transpilation_sequence.steps:
+            passes_duration += step.duration
+            for phase, value in step.overhead.items():
+                overhead[phase] = overhead.get(phase, 0) + value / 1e6
+            for phase, value in step.worker_overhead.items():
+                worker_overhead[phase] = worker_overhead.get(phase, 0) + value / 1e6
+
+        total_overhead = sum(overhead.values())
+        total_worker_overhead = sum(worker_overhead.values())
+        overhead_share = (
+            100 * total_overhead / passes_duration if passes_duration > 0 else 0
+        )
+
+        total_cost_str = (
+            str(round(total_overhead, 2))
+            + " ms ("
+            + str(round(overhead_share, 1))
+            + "% of pass time)"
+        )
+        phase_costs_str = ", ".join(
+            phase + ": " + str(round(value, 2)) + " ms"
+            for phase, value in overhead.items()
+        )
+        if total_worker_overhead > 0:
+            total_cost_str += (
+                ", " + str(round(total_worker_overhead, 2)) + " ms in the worker"
+            )
+            phase_costs_str += "; worker " + ", ".join(
+                phase + ": " + str(round(value, 2)) + " ms"
+                for phase, value in worker_overhead.items()
+            )
+
+        total_cost = widgets.HTML(
+            r"<p class = 'label-purple-back'>"
+            + "  Debugger overhead </p> <p class = 'label-text'>"
+            + total_cost_str
+            + "</p>"
+        )
+
+        phase_costs = widgets.HTML(
+            r"<p class = 'label-purple-back'>"
+            + "  Overhead per phase </p> <p class = 'label-text'>"
+            + phase_costs_str
+            + "</p>"
+        )
+
         overview_children = [
             transform_head,
             analyse_head,
@@ -247,6 +379,8 @@ class TimelineView(widgets.VBox):
             final_depth,
             init_ops,
             final_ops,
+            total_cost,
+            phase_costs,
         ]
 
         return overview_children
@@ -341,32 +475,101 @@ class TimelineView(widgets.VBox):
         self.pass_panel.children = pass_children
 
     def add_step(self, step):
-        step_items = []
+        self.add_steps([step])
+
+    def add_steps(self, steps):
+        # only steps on the shown page get a row, the others just count
+        positions = [
+            step.index - self._first_row
+            for step in steps
+            if 0 <= step.index - self._first_row < self.TIMELINE_ROWS
+        ]
+        with self.timeline_panel.hold_sync():
+            if positions:
+                self._add_rows(max(positions) + 1 - len(self._rows))
+            for position in positions:
+                self._bind_row(self._rows[position], self._first_row + position)
+
+            self._update_timeline_pager()
+
+        if steps:
+            self._update_diff_bases(min(step.index for step in steps))
+
+    def _add_rows(self, count):
+        # the timeline gets the new rows in a single update
+        if count <= 0:
+            return
+
+        rows = [self._new_row() for _ in range(count)]
+        self._rows.extend(rows)
+        self.timeline_panel.children = self.timeline_panel.children + tuple(
+            widget for row in rows for widget in (row["item"], row["slot"])
+        )
 
-        _item = ButtonWithValue(
-            value=str(step.index),
-            description="",
-            icon="caret-right",
-            tooltip=step.type.value + " Pass",
-            layout={"width": "11px"},
+    def _new_row(self):
+        button = ButtonWithValue(
+            value="", description="", icon="caret-right", layout={"width": "11px"}
         )
-        _item.on_click(self.on_pass)
-        step_items.append(widgets.Box([_item]))
+        button.on_click(self.on_pass)
 
-        _item = widgets.HTML(r"<p>" + str(step.index) + " - " + step.name + "</p>")
-        _item.add_class(step.type.value.lower())
-        step_items.append(_item)
+        name = widgets.HTML("")
+        duration = widgets.Label("")
+        stats = [widgets.HTML("") for _ in range(5)]
+
+        item_wpr = widgets.GridBox(
+            [widgets.Box([button]), name, duration] + stats,
+            layout={"width": "100%", "min_height": "47px",},
+        )
+        item_wpr.add_class("transpilation-step")
+
+        return {
+            "item": item_wpr,
+            "button": button,
+            "name": name,
+            "duration": duration,
+            "stats": stats,
+            "slot": widgets.Box(layout={"width": "100%"}),
+        }
+
+    def _bind_row(self, row, step_index):
+        # widgets only resync the values which change
+        step = self.transpilation_sequence.steps[step_index]
+        details_panel = self._details_panels.get(step_index)
+
+        row["item"].layout.display = None
+        row["button"].value = str(step_index)
+        row["button"].tooltip = step.type.value + " Pass"
+        if (
+            details_panel is not None
+            and "step-details-hide" not in details_panel._dom_classes
+        ):
+            row["button"].icon = "caret-down"
+        else:
+            row["button"].icon = "caret-right"
+
+        name = row["name"]
+        name.value = r"<p>" + str(step.index) + " - " + step.name + "</p>"
+        for pass_type in PassType:
+            if pass_type != step.type:
+                name.remove_class(pass_type.value.lower())
+        name.add_class(step.type.value.lower())
+        if step.unchanged:
+            name.add_class("unchanged")
+        else:
+            name.remove_class("unchanged")
 
         from math import log10
 
+        duration = row["duration"]
+        for dom_class in duration._dom_classes:
+            duration.remove_class(dom_class)
         if step.duration > 0:
             duration_font_size = 10
             duration_font_size = 10 + round(log10(step.duration))
-            _item = widgets.Label(str(round(step.duration, 1)) + " ms")
-            _item.add_class("fs" + str(duration_font_size))
+            duration.value = str(round(step.duration, 1)) + " ms"
+            duration.add_class("fs" + str(duration_font_size))
         else:
-            _item = widgets.Label("")
-        step_items.append(_item)
+            duration.value = ""
 
         # circuit stats:
         if step.index == 0:
@@ -374,67 +577,134 @@ class TimelineView(widgets.VBox):
         else:
             prev_stats = self.transpilation_sequence.steps[step.index - 1].circuit_stats
 
-        _item = widgets.HTML(
-            '<span class="stat-name">Depth </span><span class="stat-value">'
-            + str(step.circuit_stats.depth)
-            + "</span>"
-        )
-        if prev_stats.depth != step.circuit_stats.depth:
-            _item.add_class("highlight")
-        step_items.append(_item)
-
-        _item = widgets.HTML(
-            '<span class="stat-name">Size </span><span class="stat-value">'
-            + str(step.circuit_stats.size)
-            + "</span>"
-        )
-        if prev_stats.size != step.circuit_stats.size:
-            _item.add_class("highlight")
-        step_items.append(_item)
-
-        _item = widgets.HTML(
-            '<span class="stat-name">Width </span><span class="stat-value">'
-            + str(step.circuit_stats.width)
-            + "</span>"
+        for item, (stat_name, attr) in zip(
+            row["stats"],
+            (
+                ("Depth", "depth"),
+                ("Size", "size"),
+                ("Width", "width"),
+                ("1Q ops", "ops_1q"),
+                ("2Q ops", "ops_2q"),
+            ),
+        ):
+            value = getattr(step.circuit_stats, attr)
+            item.value = (
+                '<span class="stat-name">'
+                + stat_name
+                + ' </span><span class="stat-value">'
+                + str(value)
+                + "</span>"
+            )
+            if getattr(prev_stats, attr) != value:
+                item.add_class("highlight")
+            else:
+                item.remove_class("highlight")
+
+        row["slot"].children = () if details_panel is None else (details_panel,)
+
+    def _show_rows(self, first_row):
+        # the panels of the steps paged out stop rendering
+        for step_index in self._details_panels:
+            if not first_row <= step_index < first_row + self.TIMELINE_ROWS:
+                self._cancel_jobs(step_index)
+
+        self._first_row = first_row
+        num_steps = len(self.transpilation_sequence.steps)
+        with self.timeline_panel.hold_sync():
+            self._add_rows(
+                min(self.TIMELINE_ROWS, num_steps - first_row) - len(self._rows)
+            )
+
+            for position, row in enumerate(self._rows):
+                if first_row + position < num_steps:
+                    self._bind_row(row, first_row + position)
+                    self._resume_jobs(first_row + position)
+                else:
+                    row["item"].layout.display = "none"
+                    row["slot"].children = ()
+
+            self._update_timeline_pager()
+
+    def show_step(self, step_index):
+        """Pages the timeline to the page holding step ``step_index``."""
+        num_steps = len(self.transpilation_sequence.steps)
+        step_index = min(max(step_index, 0), max(num_steps - 1, 0))
+        first_row = step_index - step_index % self.TIMELINE_ROWS
+        if first_row != self._first_row:
+            self._show_rows(first_row)
+
+    def _get_timeline_pager(self):
+        buttons = []
+        for action, icon, tooltip in (
+            ("first", "angle-double-left", "First steps"),
+            ("prev", "angle-left", "Previous steps"),
+            ("next", "angle-right", "Next steps"),
+            ("last", "angle-double-right", "Last steps"),
+        ):
+            button = ButtonWithValue(
+                value=action,
+                description="",
+                icon=icon,
+                tooltip=tooltip,
+                layout={"width": "32px"},
+            )
+            button.on_click(self.on_timeline_page)
+            buttons.append(button)
+
+        self._timeline_label = widgets.Label("")
+        step_input = widgets.IntText(
+            value=0, description="Go to step", layout={"width": "180px"}
         )
-        if prev_stats.width != step.circuit_stats.width:
-            _item.add_class("highlight")
-        step_items.append(_item)
-
-        _item = widgets.HTML(
-            '<span class="stat-name">1Q ops </span><span class="stat-value">'
-            + str(step.circuit_stats.ops_1q)
-            + "</span>"
+        step_input.observe(lambda change: self.show_step(change["new"]), names="value")
+
+        pager = widgets.HBox(
+            buttons[:2] + [self._timeline_label] + buttons[2:] + [step_input],
+            layout={"width": "100%", "display": "none"},
         )
-        if prev_stats.ops_1q != step.circuit_stats.ops_1q:
-            _item.add_class("highlight")
-        step_items.append(_item)
-
-        _item = widgets.HTML(
-            '<span class="stat-name">2Q ops </span><span class="stat-value">'
-            + str(step.circuit_stats.ops_2q)
-            + "</span>"
+        pager.add_class("window-pager")
+        return pager
+
+    def _update_timeline_pager(self):
+        num_steps = len(self.transpilation_sequence.steps)
+        self._timeline_label.value = (
+            "Steps "
+            + str(self._first_row)
+            + "-"
+            + str(min(self._first_row + self.TIMELINE_ROWS, num_steps) - 1)
+            + " of "
+            + str(num_steps)
         )
-        if prev_stats.ops_2q != step.circuit_stats.ops_2q:
-            _item.add_class("highlight")
-        step_items.append(_item)
+        if num_steps > self.TIMELINE_ROWS:
+            self.timeline_pager.layout.display = None
+
+    def on_timeline_page(self, btn):
+        num_steps = len(self.transpilation_sequence.steps)
+        if btn.value == "first":
+            self.show_step(0)
+        elif btn.value == "prev":
+            self.show_step(self._first_row - self.TIMELINE_ROWS)
+        elif btn.value == "next":
+            self.show_step(self._first_row + self.TIMELINE_ROWS)
+        else:
+            self.show_step(num_steps - 1)
 
-        item_wpr = widgets.GridBox(
-            step_items, layout={"width": "100%", "min_height": "47px",},
-        )
-        item_wpr.add_class("transpilation-step")
+    def _get_details_panel(self, step_index):
+        details_panel = self._details_panels.get(step_index)
+        if details_panel is None:
+            details_panel = widgets.Box(layout={"width": "100%"})
+            details_panel.add_class("step-details")
+            details_panel.add_class("step-details-hide")
+            self._details_panels[step_index] = details_panel
 
-        details_wpr = widgets.Box(layout={"width": "100%"})
-        details_wpr.add_class("step-details")
-        details_wpr.add_class("step-details-hide")
+            # show it if the step is on the current page
+            position = step_index - self._first_row
+            if 0 <= position < len(self._rows):
+                self._rows[position]["slot"].children = (details_panel,)
 
-        self.timeline_panel.children = self.timeline_panel.children + (
-            item_wpr,
-            details_wpr,
-        )
+        return details_panel
 
     def show_details(self, step_index, title, content, width):
-        details_panel = self.timeline_panel.children[2 * step_index + 1]
+        details_panel = self._get_details_panel(step_index)
         out = widgets.Output(layout={"width": "100%"})
         details_panel.children = (out,)
 
@@ -457,31 +727,35 @@ class TimelineView(widgets.VBox):
         step = self.transpilation_sequence.steps[step_index]
 
         # Toggle detailed view:
-        details_panel = self.timeline_panel.children[2 * step_index + 1]
+        details_panel = self._get_details_panel(step_index)
         if "step-details-hide" not in details_panel._dom_classes:
             details_panel.add_class("step-details-hide")
             btn.icon = "caret-right"
+            self._cancel_jobs(step_index)
         else:
             details_panel.remove_class("step-details-hide")
             btn.icon = "caret-down"
+            if len(details_panel.children) > 0:
+                self._resume_jobs(step_index)
+                self._prefetch(step_index)
 
         if len(details_panel.children) == 0:
 
             # First time to expand this panel
             tab_titles = ["Circuit", "Property Set", "Logs", "Help"]
+            if self.property_view == "frontend":
+                property_table_class = FrontendPropertyTable
+            else:
+                property_table_class = PropertyTable
             children = [
                 widgets.VBox(layout={"width": "100%"}),
                 widgets.HBox(
                     children=[
-                        widgets.GridBox(
-                            [],
-                            layout={
-                                "width": "50%",
-                                "padding": "5px",
-                                "grid_template_columns": "repeat(2, 50%)",
-                            },
+                        property_table_class(
+                            value=str(step_index),
+                            layout={"width": "50%", "padding": "5px"},
                         ),
-                        widgets.Output(layout={"width": "50%"}),
+                        widgets.Box(layout={"width": "50%"}),
                     ],
                     layout={"width": "100%"},
                 ),
@@ -494,19 +768,12 @@ class TimelineView(widgets.VBox):
             [tab.set_title(idx, name) for idx, name in enumerate(tab_titles)]
             details_panel.children = (tab,)
 
-            dag = self._get_step_dag(step)
-
-            # this is for the default one
-            # when a tab is clicked, we would need to show something right
-
-            # vars : tab, dag, index that's it
-            # img_thread = Thread(target=self._load_img_view, args=[dag, tab, step_index])
-
-            # img_thread.start()
-            self._load_img_view(dag, tab, step_index)
+            # the circuit is loaded and rendered in the background
+            self._load_img_view(tab, step_index)
 
             tab.observe(self.on_tab_clicked)
 
+            children[1].children[0].on_click(self.on_property)
             children[1].children[0].add_class("property-set")
             children[1].children[1].add_class("property-items")
 
@@ -515,34 +782,274 @@ class TimelineView(widgets.VBox):
             if len(step.logs) == 0:
                 tab.add_class("no-logs")
 
-    def _load_img_view(self, dag, tab, step_index):
+    def _next_generation(self, step_index):
+        generation = self._generations.get(step_index, 0) + 1
+        self._generations[step_index] = generation
+        return generation
+
+    def _cancel_jobs(self, step_index):
+        # the panel of the step was collapsed or paged out: drop its pending
+        # jobs and ignore the results of those already running
+        self._next_generation(step_index)
+        self._scheduler.cancel_stale(
+            lambda key: key[0] in ("load", "render", "diff") and key[1] == step_index
+        )
 
-        if isinstance(dag, DAGCircuit):
+    def _resume_jobs(self, step_index):
+        # restarts what _cancel_jobs dropped from an expanded panel
+        details_panel = self._details_panels.get(step_index)
+        if (
+            details_panel is None
+            or len(details_panel.children) == 0
+            or "step-details-hide" in details_panel._dom_classes
+        ):
+            return
 
-            img_wpr = widgets.Output(layout={"width": "100%"})
-            img_wpr.append_display_data(HTML(self._get_spinner_html()))
+        tab = details_panel.children[0]
+        if any(
+            "circuit-loader" in child._dom_classes
+            for child in tab.children[0].children
+        ):
+            self._load_img_view(tab, step_index)
+            return
 
-            circ = dag_to_circuit(dag)
-            img_html = self._view_circuit(circ, "after_pass_" + str(step_index))
-            img_wpr.outputs = []
-            img_wpr.append_display_data(HTML(img_html))
+        state = self._windows.get(step_index)
+        if (
+            state is not None
+            and "diff_chk" in state
+            and state.get("shown_key") != self._get_render_key(step_index)
+        ):
+            self._show_window(step_index)
+
+    def _load_img_view(self, tab, step_index):
+        loader = widgets.Output(layout={"width": "100%"})
+        loader.append_display_data(HTML(self._get_spinner_html()))
+        loader.add_class("circuit-loader")
+        tab.children[0].children = (loader,)
+        generation = self._next_generation(step_index)
+
+        def show(future):
+            if future.cancelled() or self._generations[step_index] != generation:
+                return
+            if future.exception() is not None:
+                self._show_error(loader, future.exception())
+            elif future.result() is None:
+                message = widgets.Label(
+                    value="The circuit of this step was not captured by the capture policy!"
+                )
+                message.add_class("message")
+                tab.children[0].children = (message,)
+            else:
+                tab.children[0].children = self._get_img_view(step_index)
+                self._show_window(step_index)
+
+            # queued after the render of this step
+            self._prefetch(step_index)
+
+        self._scheduler.submit(
+            ("load", step_index), self._get_window_state, step_index, callback=show
+        )
+
+    def _get_img_view(self, step_index):
+        state = self._windows[step_index]
 
-            diff_chk = widgets.Checkbox(
-                model_id="step:" + str(step_index),
-                value=False,
-                description="Highlight diff",
-                indent=False,
+        diff_chk = widgets.Checkbox(
+            model_id="step:" + str(step_index),
+            value=False,
+            description=self._get_diff_description(step_index, None),
+            indent=False,
+            layout={"width": "auto"},
+        )
+        diff_chk.observe(self.on_diff)
+        state["diff_chk"] = diff_chk
+
+        diff_base = widgets.Dropdown(
+            options=self._get_diff_base_options(step_index),
+            value=state["diff_base"],
+            layout={"width": "auto"},
+        )
+        diff_base.observe(
+            lambda change: self.on_diff_base(step_index, change["new"]),
+            names="value",
+        )
+        state["diff_base_list"] = diff_base
+
+        if self.circuit_view == "canvas" and self._canvas_rendered:
+            # the canvas pans and zooms over the whole circuit, no pager
+            canvas = CircuitCanvas(layout={"width": "100%"})
+            canvas.set_circuit(*self._get_circuit(step_index))
+            state["canvas"] = canvas
+            return (
+                widgets.HBox([diff_chk, diff_base]),
+                canvas,
+                self._get_export_bar(step_index),
             )
-            diff_chk.observe(self.on_diff)
 
-            tab.children[0].children = (diff_chk, img_wpr)
+        img_wpr = widgets.Output(layout={"width": "100%"})
+        state["img_wpr"] = img_wpr
+        children = (
+            widgets.HBox([diff_chk, diff_base]),
+            img_wpr,
+            self._get_export_bar(step_index),
+            self._get_window_pager(step_index),
+        )
+        if self.circuit_view == "canvas":
+            # an empty canvas tells whether the front-end can draw them
+            probe = CircuitCanvas(layout={"display": "none"})
+            probe.on_rendered(lambda _: self._on_canvas_rendered(step_index))
+            children += (probe,)
+        return children
+
+    def _on_canvas_rendered(self, step_index):
+        # the front-end draws canvases: switch the step to one, the next
+        # steps get one right away
+        self._canvas_rendered = True
+        state = self._windows[step_index]
+        if "canvas" in state:
+            return
+
+        self._next_generation(step_index)
+        state["diff_on"] = False
+        state.pop("img_wpr", None)
+        tab = self._details_panels[step_index].children[0]
+        tab.children[0].children = self._get_img_view(step_index)
+        self._show_window(step_index)
+
+    def _get_export_bar(self, step_index):
+        buttons = []
+        for export_format, description in (("qpy", "QPY"), ("qasm", "QASM")):
+            button = ButtonWithValue(
+                value=str(step_index) + "," + export_format,
+                description=description,
+                icon="file",
+                tooltip="Export the circuit of this step as " + description,
+                layout={"width": "auto"},
+            )
+            button.on_click(self.on_export)
+            buttons.append(button)
 
-        else:
-            message = widgets.Label(
-                value="Displaying circuits with depth larger than 300 is not supported!"
+        export_out = widgets.Output()
+        self._windows[step_index]["export_out"] = export_out
+
+        export_bar = widgets.HBox(
+            [widgets.Label("Export:")] + buttons + [export_out],
+            layout={"width": "100%"},
+        )
+        export_bar.add_class("circuit-export-wpr")
+        return export_bar
+
+    def on_export(self, btn):
+        from io import BytesIO
+        from binascii import b2a_base64
+        from qiskit.circuit import qpy_serialization
+
+        step_index_str, export_format = btn.value.split(",")
+        step_index = int(step_index_str)
+        state = self._windows[step_index]
+
+        # export the whole circuit of the step, not only the shown window
+        suffix = "after_pass_" + str(step_index)
+
+        state["export_out"].outputs = []
+        try:
+            entry = self._get_circuit(step_index)
+            if entry is None:
+                raise ValueError("the circuit of this step is no longer available")
+            circuit = entry[0]
+            if export_format == "qpy":
+                qpy_bio = BytesIO()
+                qpy_serialization.dump(circuit, qpy_bio)
+                payload = qpy_bio.getvalue()
+            else:
+                payload = bytes(circuit.qasm(), "ascii")
+        except Exception as error:
+            state["export_out"].append_display_data(
+                HTML(
+                    '<div class="message">The circuit could not be exported: '
+                    + html.escape(str(error))
+                    + "</div>"
+                )
+            )
+            return
+
+        file_name = "circuit_" + suffix + "." + export_format
+        payload_data = b2a_base64(payload).decode()
+        state["export_out"].append_display_data(
+            HTML(
+                f"""<a download="{file_name}" href="data:application/octet-stream;base64,{payload_data}">
+                    <i class="fa fa-download"></i> <span>{file_name}</span>
+                </a>"""
             )
-            message.add_class("message")
-            tab.children[0].children = (message,)
+        )
+
+    def _get_window_state(self, step_index):
+        # the view state of the circuit tab of a step, None if its circuit
+        # was not captured
+        entry = self._get_circuit(step_index)
+        if entry is None:
+            return None
+
+        with self._windows_lock:
+            state = self._windows.get(step_index)
+            if state is not None:
+                return state
+
+            window = entry[1]
+            state = {
+                "depth": window.depth,
+                "num_qubits": window.num_qubits,
+                "diff_on": False,
+                "diff_base": step_index - 1 if step_index > 0 else None,
+                "layer": 0,
+                "qubit": 0,
+            }
+            self._windows[step_index] = state
+            return state
+
+    def _get_circuit(self, step_index):
+        # the circuit of a step and its CircuitWindow, shared by the view
+        # and the prefetching jobs. None if it was not captured
+        with self._windows_lock:
+            entry = self._circuits.get(step_index)
+            if entry is not None:
+                return entry
+
+            dag = self._get_step_dag(self.transpilation_sequence.steps[step_index])
+            if not isinstance(dag, DAGCircuit):
+                return None
+
+            circ = dag_to_circuit(dag)
+            entry = (circ, CircuitWindow(circ))
+            self._circuits.put(step_index, entry)
+            return entry
+
+    def _prefetch(self, step_index):
+        # render the neighbours of an expanded step ahead, in their
+        # default view, and drop what was queued for other steps
+        neighbours = [
+            idx
+            for idx in range(
+                step_index - self.PREFETCH_STEPS, step_index + self.PREFETCH_STEPS + 1
+            )
+            if idx != step_index and 0 <= idx < len(self.transpilation_sequence.steps)
+        ]
+        self._scheduler.cancel_stale(
+            lambda key: key[0] == "prefetch" and key[1] not in neighbours
+        )
+
+        for idx in neighbours:
+            self._scheduler.submit(("prefetch", idx), self._prefetch_step, idx)
+
+    def _prefetch_step(self, step_index):
+        # only the circuit and images are made, the view state of the step
+        # is created once it is expanded
+        if self._get_circuit(step_index) is None:
+            return
+
+        default_base = step_index - 1 if step_index > 0 else None
+        if self.circuit_view == "image":
+            self._render_window((step_index, None, 0, 0))
+        self.transpilation_sequence.diff(default_base, step_index)
 
     def on_tab_clicked(self, change):
         if change["type"] == "change" and change["name"] == "selected_index":
@@ -557,68 +1064,17 @@ class TimelineView(widgets.VBox):
                 # If content is already rendered, do nothing:
                 if (
                     type(tabs.children[1].children[0]) == widgets.Label
-                    or len(properties_panel.children) > 0
+                    or len(properties_panel.html) > 0
                 ):
                     return
 
                 _property_set = self._get_step_property_set(step)
                 if len(_property_set) > 0:
-                    properties_panel.add_class("table")
-                    panel_height = {}
-                    properties_panel.layout = {
-                        "width": "50%",
-                        "padding": "5px",
-                        "grid_template_columns": "repeat(2, 50%)",
-                        "height": str(33 * len(_property_set)) + "px",
-                    }
-
-                    for prop_name in _property_set:
-                        property = _property_set[prop_name]
-                        u = widgets.Label(value=property.name)
-                        if property.type not in (int, float, bool, str):
-                            txt = (
-                                "(dict)"
-                                if type(property.value) == defaultdict
-                                else "(" + property.type.__name__ + ")"
-                            )
-                            prop_label = widgets.Label(txt, layout={"width": "80%"})
-                            prop_button = ButtonWithValue(
-                                value=None, description="...", layout={"width": "20%"}
-                            )
-                            prop_button.on_click(self.on_property)
-                            v = widgets.HBox(
-                                [prop_label, prop_button], layout={"width": "100%"}
-                            )
-                        else:
-                            v = widgets.Label(value=str(property.value))
-
-                        if step.property_set_index == step.index:
-                            if property.state != "updated":
-                                u.add_class(property.state)
-                            v.add_class(property.state)
-
-                        index = len(properties_panel.children)
-                        properties_panel.children = properties_panel.children + (u, v)
-
-                        if property.type not in (int, float, bool, str):
-                            properties_panel.children[index + 1].children[1].value = (
-                                str(step.index) + "," + property.name
-                            )
-                        else:
-                            properties_panel.children[index + 1].value = str(
-                                property.value
-                            )
-
-                    dd = list(properties_panel.children)
-                    for m in range(int(len(dd) / 2)):
-                        if properties_panel.children[2 * m].value not in _property_set:
-                            properties_panel.children[2 * m].add_class("not-exist")
-                            properties_panel.children[2 * m + 1].add_class("not-exist")
-                        else:
-                            properties_panel.children[2 * m].remove_class("not-exist")
-                            properties_panel.children[2 * m + 1].remove_class(
-                                "not-exist"
-                            )
+                    # the whole table is sent at once
+                    properties_panel.set_properties(
+                        _property_set,
+                        show_state=step.property_set_index == step.index,
+                    )
                 else:
                     message = widgets.Label(value="Property set is empty!")
                     message.add_class("message")
@@ -680,230 +1136,367 @@ class TimelineView(widgets.VBox):
             dummy, step_index_str = chk.model_id.split(":")
             step_index = int(step_index_str)
 
-            details_panel = self.timeline_panel.children[2 * int(step_index) + 1]
-            img_wpr = details_panel.children[0].children[0].children[1]
-            img_wpr.outputs = []
-            img_wpr.append_display_data(
-                HTML(self._get_spinner_html())
-            )  # to get the loader gif
-
-            if change["new"]["value"]:
-                if step_index > 0:
-                    prev_dag = self._get_step_dag(
-                        self.transpilation_sequence.steps[step_index - 1]
-                    )
-                    prev_circ = dag_to_circuit(prev_dag)
-                else:
-                    prev_circ = None
+            self._windows[step_index]["diff_on"] = change["new"]["value"]
+            self._show_window(step_index)
+
+    def on_diff_base(self, step_index, base_index):
+        state = self._windows[step_index]
+        if state.get("diff_base_refresh"):
+            return
+        state["diff_base"] = base_index
+        if state["diff_on"]:
+            self._show_window(step_index)
+
+    def _get_diff_description(self, step_index, diff):
+        if not self._windows[step_index]["diff_on"]:
+            if self.transpilation_sequence.steps[step_index].unchanged:
+                # nothing to highlight against the previous step
+                return "Circuit unchanged, highlight diff against"
+            return "Highlight diff against"
+
+        if diff is None:
+            return "Circuit not captured, highlight diff against"
+        if diff.fully_changed:
+            return "Circuit changed fully from"
+        if not diff.changed:
+            return "Circuit unchanged from"
+        return "Highlight diff against"
+
+    def _get_diff_base_options(self, step_index):
+        options = []
+        if step_index > 0:
+            options.append(("the previous step", step_index - 1))
+        options.append(("the original circuit", None))
+
+        # only the nearby steps, _update_diff_bases adds those arriving later
+        steps = self.transpilation_sequence.steps
+        for idx in range(
+            max(step_index - self.DIFF_BASE_STEPS, 0),
+            min(step_index + self.DIFF_BASE_STEPS + 1, len(steps)),
+        ):
+            if idx != step_index:
+                options.append((str(idx) + ": " + steps[idx].name, idx))
+        return options
+
+    def _update_diff_bases(self, first_index):
+        # steps from first_index on were added, refresh the lists of the
+        # expanded steps they are near to
+        for step_index, state in list(self._windows.items()):
+            if (
+                "diff_base_list" not in state
+                or step_index + self.DIFF_BASE_STEPS < first_index
+            ):
+                continue
 
-                curr_dag = self._get_step_dag(
-                    self.transpilation_sequence.steps[step_index]
+            # changing the options resets the selection, keep it
+            state["diff_base_refresh"] = True
+            try:
+                state["diff_base_list"].options = self._get_diff_base_options(
+                    step_index
                 )
-                curr_circ = dag_to_circuit(curr_dag)
+                state["diff_base_list"].value = state["diff_base"]
+            finally:
+                state["diff_base_refresh"] = False
+
+    def _get_window_pager(self, step_index):
+        state = self._windows[step_index]
+
+        buttons = []
+        for action, icon, tooltip in (
+            ("prev_layers", "chevron-left", "Previous layers"),
+            ("next_layers", "chevron-right", "Next layers"),
+            ("prev_qubits", "chevron-up", "Previous qubits"),
+            ("next_qubits", "chevron-down", "Next qubits"),
+        ):
+            button = ButtonWithValue(
+                value=str(step_index) + "," + action,
+                description="",
+                icon=icon,
+                tooltip=tooltip,
+                layout={"width": "32px"},
+            )
+            button.on_click(self.on_window)
+            buttons.append(button)
 
-                # okay so this is basically the circuit diff class
+        label = widgets.Label(self._get_window_label(step_index))
+        state["label"] = label
 
-                fully_changed, disp_circ = CircuitComparator.compare(
-                    prev_circ, curr_circ
-                )
+        pager = widgets.HBox(
+            [buttons[0], buttons[1], label, buttons[2], buttons[3]],
+            layout={"width": "100%"},
+        )
+        pager.add_class("window-pager")
 
-                if fully_changed:
-                    chk.description = "Circuit changed fully"
-                    chk.disabled = True
+        if (
+            state["depth"] <= self.WINDOW_LAYERS
+            and state["num_qubits"] <= self.WINDOW_QUBITS
+        ):
+            pager.layout.display = "none"
+
+        return pager
+
+    def _get_window_label(self, step_index):
+        state = self._windows[step_index]
+        return (
+            "Layers "
+            + str(state["layer"])
+            + "-"
+            + str(min(state["layer"] + self.WINDOW_LAYERS, state["depth"]) - 1)
+            + " of "
+            + str(state["depth"])
+            + ", qubits "
+            + str(state["qubit"])
+            + "-"
+            + str(min(state["qubit"] + self.WINDOW_QUBITS, state["num_qubits"]) - 1)
+            + " of "
+            + str(state["num_qubits"])
+        )
 
-                suffix = "diff_" + str(step_index)
-            else:
-                if not chk.disabled:
-                    dag = self._get_step_dag(
-                        self.transpilation_sequence.steps[step_index]
-                    )
-                    disp_circ = dag_to_circuit(dag)
-                    suffix = "after_pass_" + str(step_index)
+    def on_window(self, btn):
+        step_index_str, action = btn.value.split(",")
+        step_index = int(step_index_str)
+        state = self._windows[step_index]
+
+        if action == "prev_layers":
+            layer = max(state["layer"] - self.WINDOW_LAYERS, 0)
+            qubit = state["qubit"]
+        elif action == "next_layers":
+            layer = state["layer"] + self.WINDOW_LAYERS
+            layer = state["layer"] if layer >= state["depth"] else layer
+            qubit = state["qubit"]
+        elif action == "prev_qubits":
+            layer = state["layer"]
+            qubit = max(state["qubit"] - self.WINDOW_QUBITS, 0)
+        else:
+            layer = state["layer"]
+            qubit = state["qubit"] + self.WINDOW_QUBITS
+            qubit = state["qubit"] if qubit >= state["num_qubits"] else qubit
+
+        if (layer, qubit) == (state["layer"], state["qubit"]):
+            return
+
+        state["layer"] = layer
+        state["qubit"] = qubit
+        state["label"].value = self._get_window_label(step_index)
+
+        self._show_window(step_index)
+
+    def _get_render_key(self, step_index):
+        # everything the rendered window depends on
+        state = self._windows[step_index]
+        diff_base = ("diff", state["diff_base"]) if state["diff_on"] else None
+        return (step_index, diff_base, state["layer"], state["qubit"])
+
+    def _show_window(self, step_index):
+        state = self._windows[step_index]
+        if "canvas" in state:
+            self._show_canvas(step_index)
+            return
+
+        img_wpr = state["img_wpr"]
+        img_wpr.outputs = []
+        img_wpr.append_display_data(HTML(self._get_spinner_html()))
+
+        key = self._get_render_key(step_index)
+        generation = self._replace_jobs(step_index, "render", key)
+
+        def show(future):
+            # a newer render was requested in the meantime
+            if future.cancelled() or self._generations[step_index] != generation:
+                return
+            if future.exception() is not None:
+                self._show_error(img_wpr, future.exception())
+                return
+
+            img_html, diff = future.result()
+            state["diff_chk"].description = self._get_diff_description(
+                step_index, diff
+            )
 
-            # here, qasm and qpy need the without diff circuits
-            img_html = self._view_circuit(disp_circ, suffix)
             img_wpr.outputs = []
             img_wpr.append_display_data(HTML(img_html))
+            state["shown_key"] = key
 
-    def on_property(self, btn):
-
-        import warnings
-
-        warnings.filterwarnings(
-            "ignore",
-            message="Back-references to from Bit instances to their containing Registers have been deprecated. Instead, inspect Registers to find their contained Bits.",
+        self._scheduler.submit(
+            ("render",) + key, self._render_window, key, callback=show
         )
 
-        step_index, property_name = btn.value.split(",")
-
-        details_panel = self.timeline_panel.children[2 * int(step_index) + 1]
-        prop_details_panel = details_panel.children[0].children[1].children[1]
+    def _show_canvas(self, step_index):
+        # the canvas already shows the circuit, only the highlight changes
+        state = self._windows[step_index]
+        key = self._get_render_key(step_index)
+        generation = self._replace_jobs(step_index, "diff", key)
+
+        def show(future):
+            if future.cancelled() or self._generations[step_index] != generation:
+                return
+            if future.exception() is not None:
+                self._show_error(state["export_out"], future.exception())
+                return
+
+            diff = future.result()
+            state["diff_chk"].description = self._get_diff_description(
+                step_index, diff
+            )
+            highlight = self._get_highlight(diff)
+            state["canvas"].highlight([] if highlight is None else highlight)
+            state["shown_key"] = key
 
-        step = self.transpilation_sequence.steps[int(step_index)]
-        property_set = self._get_step_property_set(step)
-        property = property_set[property_name]
+        self._scheduler.submit(
+            ("diff",) + key, self._get_window_diff, key, callback=show
+        )
 
-        html_str = '<table style="width: 100%">'
-        html_str = (
-            html_str
-            + '<thead><tr><th colspan="'
-            + ("2" if type(property.value) == defaultdict else "1")
-            + '">'
-            + property_name
-            + "</th></tr></thead>"
+    def _replace_jobs(self, step_index, job, key):
+        # a new window of the step replaces the pending ones
+        self._scheduler.cancel_stale(
+            lambda pending: pending[0] == job
+            and pending[1] == step_index
+            and pending[1:] != key
         )
-        if property_name == "block_list":
-            for v in property.value:
-                v_arr = []
-                for node in v:
-                    qargs = ", ".join(
-                        [
-                            qarg.register.name
-                            + "<small>["
-                            + str(qarg.index)
-                            + "]</small>"
-                            for qarg in node.qargs
-                        ]
-                    )
-                    v_arr.append(
-                        "<strong>" + node.name + "</strong>" + "(" + qargs + ")"
-                    )
-                html_str = html_str + "<tr><td>" + " - ".join(v_arr) + "</td></tr>"
-        elif property_name == "commutation_set":
-            for key, v in property.value.items():
-                key_str = ""
-                if type(key) is tuple:
-                    qargs = ", ".join(
-                        [
-                            qarg.register.name
-                            + "<small>["
-                            + str(qarg.index)
-                            + "]</small>"
-                            for qarg in key[0].qargs
-                        ]
-                    )
-                    key_str = (
-                        "(<strong>"
-                        + (key[0].name if key[0].name != None else "")
-                        + "</strong>("
-                        + qargs
-                        + "), "
-                    )
-                    key_str = (
-                        key_str
-                        + key[1].register.name
-                        + "<small>["
-                        + str(key[1].index)
-                        + "]</small>"
-                        + ")"
-                    )
-                else:
-                    key_str = (
-                        key.register.name + "<small>[" + str(key.index) + "]</small>"
-                    )
+        return self._next_generation(step_index)
+
+    def _get_window_diff(self, key):
+        step_index, diff_base = key[0], key[1]
+        if diff_base is None:
+            return None
+        # diffs are cached by the transpilation sequence
+        return self.transpilation_sequence.diff(diff_base[1], step_index)
+
+    def _get_highlight(self, diff):
+        # the added instructions, unless there is nothing worth highlighting
+        if diff is not None and diff.changed and not diff.fully_changed:
+            return diff.added
+        return None
+
+    def _render_window(self, key):
+        # returns the html of a window and the diff highlighted in it
+        step_index, diff_base, layer, qubit = key
+        diff = self._get_window_diff(key)
+        highlight = self._get_highlight(diff)
+        if diff_base is None:
+            suffix = "after_pass_" + str(step_index)
+        else:
+            suffix = "diff_" + str(step_index)
+
+        img_html = self._view_window(step_index, layer, qubit, highlight, suffix)
+        return (img_html, diff)
+
+    def _get_window_circuit(self, step_index, layer, qubit):
+        # the circuit shown in a window, the number of gates omitted from it
+        # and the index of its instructions in the full circuit, or None if
+        # the circuit is small enough to be shown in full
+        # prefetched steps have no view state yet
+        state = self._windows.get(step_index, {})
+        entry = self._get_circuit(step_index)
+        if entry is None:
+            raise ValueError("the circuit of this step is no longer available")
+        circuit, window = entry
+
+        if "canvas" in state or (
+            window.depth <= self.WINDOW_LAYERS
+            and window.num_qubits <= self.WINDOW_QUBITS
+        ):
+            return circuit, 0, None
 
-                value_str = ""
-                if type(v) is list:
-                    value_str = value_str + "["
-                    for nodes in v:
-                        if type(nodes) is list:
-                            nodes_arr = []
-                            for node in nodes:
-                                if node.type == "op":
-                                    qargs = ", ".join(
-                                        [
-                                            qarg.register.name
-                                            + "<small>["
-                                            + str(qarg.index)
-                                            + "]</small>"
-                                            for qarg in node.qargs
-                                        ]
-                                    )
-                                    node_str = (
-                                        "<strong>"
-                                        + (node.name if node.name != None else "")
-                                        + "</strong>"
-                                        + "("
-                                        + qargs
-                                        + ")"
-                                    )
-                                else:
-                                    node_str = (
-                                        node.type.upper()
-                                        + "(wire="
-                                        + node.wire.register.name
-                                        + "<small>["
-                                        + str(node.wire.index)
-                                        + "]</small>)"
-                                    )
-
-                                nodes_arr.append(node_str)
-
-                            value_str = (
-                                value_str + "[" + (", ".join(nodes_arr)) + "]<br>"
-                            )
-                    value_str = value_str + "]"
+        return window.cut(
+            layer,
+            layer + self.WINDOW_LAYERS,
+            qubit,
+            qubit + self.WINDOW_QUBITS,
+        )
 
-                html_str = (
-                    html_str
-                    + '<tr><td style="width:50%">'
-                    + key_str
-                    + "</td><td><pre>"
-                    + value_str
-                    + "</pre></td></tr>"
-                )
+    def _view_window(self, step_index, layer, qubit, highlight, suffix):
+        # only render the visible window of large circuits
+        disp_circuit, omitted, indices = self._get_window_circuit(
+            step_index, layer, qubit
+        )
+        if indices is None:
+            position = None
         else:
-            html_str = (
-                html_str
-                + "<tr><td><pre>"
-                + html.escape(str(property.value))
-                + "</pre></td></tr>"
+            position = (layer, qubit, self.WINDOW_LAYERS, self.WINDOW_QUBITS)
+            suffix = suffix + "_layers_" + str(layer) + "_qubits_" + str(qubit)
+            if highlight is not None:
+                # map the highlighted instructions to their place in the window
+                highlight = np.flatnonzero(np.isin(indices, highlight))
+
+        if highlight is not None and len(highlight) == 0:
+            highlight = None
+
+        # the image only depends on the content of the circuit, so steps
+        # sharing a circuit share its images. Circuits whose snapshot was
+        # dropped have no key and are not cached
+        circuit_key = self.transpilation_sequence.circuit_key(step_index)
+        image_key = None
+        if circuit_key is not None:
+            image_key = RenderCache.make_key(
+                circuit_key,
+                position,
+                None
+                if highlight is None
+                else np.asarray(highlight, np.int64).tobytes(),
+                CircuitDiff.HIGHLIGHT_COLORS,
+                sorted(self.DRAW_OPTIONS.items()),
+                draw_style(self.DRAW_OPTIONS),
+            )
+        img_html = self._view_circuit(disp_circuit, suffix, highlight, image_key)
+
+        if omitted > 0:
+            img_html = (
+                '<div class="window-note">'
+                + str(omitted)
+                + " gates crossing the qubit window are not shown.</div>"
+                + img_html
             )
-        html_str = html_str + "</table>"
 
-        prop_details_panel.outputs = []
-        prop_details_panel.append_display_data(HTML(html_str))
+        return img_html
 
-    def _view_circuit(self, disp_circuit, suffix):
-        from io import BytesIO
-        from binascii import b2a_base64
+    def _show_error(self, out, error):
+        out.outputs = []
+        out.append_display_data(
+            HTML(
+                '<div class="message">The circuit could not be rendered: '
+                + html.escape(str(error))
+                + "</div>"
+            )
+        )
 
-        if "diff" in suffix:
-            # means checkbox has been chosen for diff
-            img_style = {"gatefacecolor": "orange", "gatetextcolor": "black"}
+    def on_property(self, table, property_name):
 
-        else:
-            img_style = None
-
-        fig = disp_circuit.draw(
-            "mpl",
-            idle_wires=False,
-            with_layout=False,
-            scale=0.9,
-            fold=20,
-            style=img_style,
+        import warnings
+
+        warnings.filterwarnings(
+            "ignore",
+            message="Back-references to from Bit instances to their containing Registers have been deprecated. Instead, inspect Registers to find their contained Bits.",
         )
 
-        img_bio = BytesIO()
-        fig.savefig(img_bio, format="png", bbox_inches="tight")
-        fig.clf()
-        img_data = b2a_base64(img_bio.getvalue()).decode()
+        step_index = table.value
 
-        from qiskit.circuit import qpy_serialization
+        details_panel = self._get_details_panel(int(step_index))
+        prop_details_panel = details_panel.children[0].children[1].children[1]
 
-        qpy_bio = BytesIO()
-        qpy_serialization.dump(disp_circuit, qpy_bio)
-        qpy_data = b2a_base64(qpy_bio.getvalue()).decode()
+        step = self.transpilation_sequence.steps[int(step_index)]
+        property_set = self._get_step_property_set(step)
+        property = property_set[property_name]
 
-        # qasm couldn't handle the circuit changed names
+        # the value is rendered one page at a time
+        shown = prop_details_panel.children
+        if len(shown) == 0 or shown[0].property.value is not property.value:
+            prop_details_panel.children = (PropertyViewer(property),)
 
-        for instr in disp_circuit.data:
-            instr[0].name = instr[0].name.strip()
+    def _view_circuit(self, disp_circuit, suffix, highlight=None, image_key=None):
+        from binascii import b2a_base64
+
+        img_png = None if image_key is None else self.render_cache.get(image_key)
+        if img_png is None:
+            # the highlight is only applied while drawing,
+            # the exports get the circuit as it is
+            img_png = self.renderer.render(disp_circuit, highlight, self.DRAW_OPTIONS)
+            if image_key is not None:
+                self.render_cache.put(image_key, img_png)
 
-        qasm_str = disp_circuit.qasm()
-        qasm_bio = BytesIO(bytes(qasm_str, "ascii"))
-        qasm_data = b2a_base64(qasm_bio.getvalue()).decode()
+        img_data = b2a_base64(img_png).decode()
 
+        # QPY and QASM exports are only generated on request, see on_export
         img_html = f"""
             <div class="circuit-plot-wpr">
                 <img src="data:image/png;base64,{img_data}&#10;">
@@ -913,48 +1506,16 @@ class TimelineView(widgets.VBox):
                 <a download="circuit_{suffix}.png" href="data:image/png;base64,{img_data}" download>
                     <i class="fa fa-download"></i> <span>PNG</span>
                 </a>
-                <a download="circuit_{suffix}.qpy" href="data:application/octet-stream;base64,{qpy_data}" download>
-                    <i class="fa fa-download"></i> <span>QPY</span>
-                </a>
-                <a download="circuit_{suffix}.qasm" href="data:application/octet-stream;base64,{qasm_data}" download>
-                    <i class="fa fa-download"></i> <span>QASM</span>
-                </a>
             </div>
             """
 
         return img_html
 
     def _get_step_dag(self, step):
-        if step.type == PassType.TRANSFORMATION:
-            return step.dag
-        else:
-            idx = step.index
-            # Due to a bug in DAGCircuit.__eq__, we can not use ``step.dag != None``
-
-            found_transform = False
-            while (
-                not isinstance(self.transpilation_sequence.steps[idx].dag, DAGCircuit)
-                and idx > 0
-            ):
-                idx = idx - 1
-                if idx >= 0:
-                    found_transform = (
-                        self.transpilation_sequence.steps[idx].type
-                        == PassType.TRANSFORMATION
-                    )
-
-            if found_transform == False:
-                return circuit_to_dag(self.transpilation_sequence.original_circuit)
-
-            return self.transpilation_sequence.steps[idx].dag
+        return self.transpilation_sequence.get_dag(step.index)
 
     def _get_step_property_set(self, step):
-        if step.property_set_index != None:
-            return self.transpilation_sequence.steps[
-                step.property_set_index
-            ].property_set
-        else:
-            return {}
+        return self.transpilation_sequence.property_set(step.index)
 
     def _get_spinner_html(self):
         return '<div class="lds-spinner"><div></div><div></div><div></div><div></div><div></div><div></div><div></div><div></div><div></div><div></div><div></div><div></div></div>'
@@ -993,6 +1554,26 @@ class TimelineView(widgets.VBox):
             font-size: 14px;
         }
 
+        .property-table {
+            display: grid;
+            grid-template-columns: repeat(2, 50%);
+            grid-gap: 2px;
+            background: #f5f5f5;
+        }
+        .property-table > div {
+            background-color: #fff;
+            padding: 0 3px;
+            font-family: 'Open Sans', monospace;
+            font-size: 14px;
+            line-height: 28px;
+            overflow: hidden;
+            white-space: nowrap;
+            text-overflow: ellipsis;
+        }
+        .property-table .property-button { float: right; width: 20%; }
+        .property-table .new { font-weight: bold; color: #4b7bec; }
+        .property-table .updated { font-weight: bold; color: #e74c3c; }
+
         .exist { font-weight: bold; }
         .not-exist { display: none; }
 
@@ -1022,6 +1603,11 @@ class TimelineView(widgets.VBox):
                             background-color: rgba(0, 67, 206, 0.8);
                             margin-right : 10%;
         }
+        .transpilation-step .transformation.unchanged { background-color: rgba(0, 67, 206, 0.4); }
+        .window-pager { align-items: center; }
+        .window-note { font-size: 12px; color: #900; }
+        .circuit-canvas { border: 1px solid #aaa; cursor: grab; }
+        .window-pager .widget-label { font-family: 'Roboto Mono', monospace; font-size: 12px; margin: 0 10px; }
         .transpilation-step .analysis {
                         color: cornsilk;
                         padding: 3px 3px 3px 10px;
@@ -1160,6 +1746,7 @@ class TimelineView(widgets.VBox):
             text-decoration: none !important;
         }
         .circuit-export-wpr a:hover { border-color: #aaa; }
+        .circuit-export-wpr .widget-label { width: auto; margin: 0 5px 0 0; }
 
         .p-TabBar-tabIcon:before { font: normal normal normal 14px/1 FontAwesome; padding-right: 5px; }
         .p-TabBar-content > :nth-child(1) .p-TabBar-tabIcon:before { content: "\\f1de"; color: #b587f7; }
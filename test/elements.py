@@ -67,7 +67,7 @@ class TimelinePanel:
     # c. Highlight changed circuit stats
 
     # 2. Check the uncollapsed view with :
-    diff_link = '//input[@title="Highlight diff"]'
+    diff_link = '//input[contains(@title, "diff against")]'
 
     # a. Provide pass docs
     # b. Provide circuit plot
@@ -96,7 +96,19 @@ class Downloads:
 
     base_path = '//div[@class="circuit-export-wpr"]'
 
+    # QPY and QASM are exported on request, the buttons put a download
+    # link in the output of the export bar
+    export_bar = (
+        '//div[contains(@class, "circuit-export-wpr")'
+        ' and contains(@class, "widget-hbox")]'
+    )
+    export_link = export_bar + "//a[@download]"
+
     # Provide download in qasm
     # provide download in qpy
     # provide download in img
-    formats = {".png": "/a[1]", ".qpy": "/a[2]", ".qasm": "/a[3]"}
+    formats = {
+        ".png": (base_path + "/a[1]",),
+        ".qpy": (export_bar + "/button[1]", export_link),
+        ".qasm": (export_bar + "/button[2]", export_link),
+    }
@@ -0,0 +1,55 @@
+import pytest
+
+from qiskit_trebugger.model import CapturePolicy, CircuitStats, PassType
+
+
+def _stats(size, depth):
+    stats = CircuitStats()
+    stats.size = size
+    stats.depth = depth
+    return stats
+
+
+def test_transformations_only():
+    policy = CapturePolicy()
+    assert policy.selects("Optimize1qGates", PassType.TRANSFORMATION)
+    assert not policy.selects("Depth", PassType.ANALYSIS)
+
+    policy = CapturePolicy(transformations_only=False)
+    assert policy.selects("Depth", PassType.ANALYSIS)
+
+
+def test_pass_names():
+    policy = CapturePolicy(transformations_only=False, pass_names=["Depth", "Unroller"])
+    assert policy.selects("Depth", PassType.ANALYSIS)
+    assert policy.selects("Unroller", PassType.TRANSFORMATION)
+    assert not policy.selects("Optimize1qGates", PassType.TRANSFORMATION)
+
+
+def test_every_nth():
+    policy = CapturePolicy(every_nth=3)
+    # the first selected pass is always kept
+    assert [policy.keeps(position, _stats(1, 1)) for position in range(7)] == [
+        True,
+        False,
+        False,
+        True,
+        False,
+        False,
+        True,
+    ]
+
+    with pytest.raises(ValueError):
+        CapturePolicy(every_nth=0)
+
+
+def test_stats_only_above():
+    policy = CapturePolicy(stats_only_above=10)
+    assert policy.keeps(0, _stats(10, 100))
+    assert not policy.keeps(0, _stats(11, 1))
+
+
+def test_max_depth():
+    policy = CapturePolicy(max_depth=5)
+    assert policy.keeps(0, _stats(100, 5))
+    assert not policy.keeps(0, _stats(1, 6))
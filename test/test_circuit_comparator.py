@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from qiskit.circuit.random import random_circuit
+
+from qiskit_trebugger.model import CircuitComparator
+from qiskit_trebugger.model import circuit_comparator
+
+
+def _lcs_length(seq1, seq2):
+    table = [[0] * (len(seq2) + 1) for _ in range(len(seq1) + 1)]
+    for i, value1 in enumerate(seq1):
+        for j, value2 in enumerate(seq2):
+            if value1 == value2:
+                table[i + 1][j + 1] = table[i][j] + 1
+            else:
+                table[i + 1][j + 1] = max(table[i][j + 1], table[i + 1][j])
+    return table[-1][-1]
+
+
+def _sequences(seed):
+    rng = np.random.default_rng(seed)
+    ids1 = rng.integers(0, 4, rng.integers(0, 40))
+    ids2 = ids1.copy()
+    # a few edits, so that prefixes and suffixes are shared too
+    for _ in range(rng.integers(0, 10)):
+        pos = rng.integers(0, len(ids2) + 1)
+        if rng.random() < 0.5 and pos < len(ids2):
+            ids2 = np.delete(ids2, pos)
+        else:
+            ids2 = np.insert(ids2, pos, rng.integers(0, 4))
+    if rng.random() < 0.3:
+        ids2 = rng.integers(0, 4, rng.integers(0, 40))
+    return ids1, ids2
+
+
+def _check_lcs(ids1, ids2, pairs):
+    for (i, j), (next_i, next_j) in zip(pairs, pairs[1:]):
+        assert i < next_i and j < next_j
+    assert all(ids1[i] == ids2[j] for i, j in pairs)
+    assert len(pairs) == _lcs_length(ids1.tolist(), ids2.tolist())
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_lcs_backend(seed):
+    ids1, ids2 = _sequences(seed)
+    _check_lcs(ids1, ids2, CircuitComparator.make_diff(ids1, ids2, backend="lcs"))
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_lcs_backend_split(seed, monkeypatch):
+    # forces the linear space split on all but the smallest sub-problems
+    monkeypatch.setattr(circuit_comparator, "LCS_TABLE_CELLS", 8)
+    ids1, ids2 = _sequences(seed)
+    _check_lcs(ids1, ids2, CircuitComparator.make_LCS(ids1, ids2))
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_myers_backend(seed):
+    ids1, ids2 = _sequences(seed)
+    _check_lcs(ids1, ids2, CircuitComparator.make_diff(ids1, ids2, backend="myers"))
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_myers_backend_fallback(seed, monkeypatch):
+    # most of the sequences need more edits than this and fall back to the LCS
+    monkeypatch.setattr(circuit_comparator, "MYERS_MAX_EDITS", 2)
+    ids1, ids2 = _sequences(seed)
+    _check_lcs(ids1, ids2, CircuitComparator.make_diff(ids1, ids2))
+
+
+@pytest.mark.parametrize("backend", ["myers", "lcs"])
+def test_diff_partitions_the_instructions(backend):
+    prev_circ = random_circuit(4, 8, seed=1)
+    curr_circ = prev_circ.copy()
+    curr_circ.compose(random_circuit(4, 3, seed=2), inplace=True)
+    curr_circ.compose(prev_circ, inplace=True)
+
+    diff = CircuitComparator.diff(prev_circ, curr_circ, backend)
+    assert sorted([*diff.added, *diff.retained]) == list(range(len(curr_circ.data)))
+    # retained layers are equal in both circuits, everything else was removed
+    assert len(diff.removed) + len(diff.retained) == len(prev_circ.data)
+    assert len(diff.retained) > 0
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        CircuitComparator.make_diff(np.arange(3), np.arange(3), backend="patience")
@@ -0,0 +1,42 @@
+import matplotlib
+
+matplotlib.use("Agg")
+
+from qiskit import QuantumCircuit
+from qiskit.circuit import Gate
+
+from qiskit_trebugger.views.widget import circuit_renderer
+
+
+def _circuit():
+    circ = QuantumCircuit(2, 1)
+    circ.h(0)
+    circ.cx(0, 1)
+    circ.global_phase = 0.5
+    circ.measure(1, 0)
+    return circ
+
+
+def test_highlight_is_drawn():
+    circ = _circuit()
+    plain = circuit_renderer.draw_circuit(circ, None, {})
+    highlighted = circuit_renderer.draw_circuit(circ, [1], {})
+    assert highlighted != plain
+
+
+def test_highlight_falls_back_to_plain_drawing(monkeypatch):
+    def broken(*args, **kwargs):
+        raise AttributeError("_get_colors")
+
+    circ = _circuit()
+    monkeypatch.setattr(circuit_renderer, "_draw_highlighted", broken)
+    assert circuit_renderer.draw_circuit(
+        circ, [1], {}
+    ) == circuit_renderer.draw_circuit(circ, None, {})
+
+
+def test_instructions_without_qubits():
+    circ = _circuit()
+    circ.append(Gate("marker", 0, []), [])
+    circ.x(0)
+    assert circuit_renderer.draw_circuit(circ, [3, 4], {})
@@ -0,0 +1,92 @@
+import pytest
+from qiskit import QuantumCircuit
+from qiskit.circuit.random import random_circuit
+from qiskit.converters import circuit_to_dag
+
+from qiskit_trebugger.model import CircuitWindow
+
+
+def _random_circuit(seed):
+    circ = random_circuit(6, 12, measure=True, conditional=bool(seed % 2), seed=seed)
+    circ.barrier()
+    return circ
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_layers_match_the_dag(seed):
+    circ = _random_circuit(seed)
+    window = CircuitWindow(circ)
+
+    layers = [[] for _ in range(window.depth)]
+    for layer, (instruction, qargs, _) in zip(window.layers, circ.data):
+        layers[layer].append((instruction.name, tuple(qargs)))
+
+    dag_layers = [
+        [(node.op.name, tuple(node.qargs)) for node in layer["graph"].op_nodes()]
+        for layer in circuit_to_dag(circ).layers()
+    ]
+    assert [sorted(layer, key=repr) for layer in layers] == [
+        sorted(layer, key=repr) for layer in dag_layers
+    ]
+
+
+def test_full_window_is_the_circuit():
+    circ = _random_circuit(1)
+    window = CircuitWindow(circ)
+
+    cut, omitted, indices = window.cut(0, window.depth, 0, circ.num_qubits)
+    assert cut.data == circ.data
+    assert omitted == 0
+    assert indices == list(range(len(circ.data)))
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_windows_cover_the_circuit(seed):
+    circ = _random_circuit(seed)
+    window = CircuitWindow(circ)
+
+    shown = set()
+    omitted = 0
+    for layer in range(0, window.depth, 4):
+        for qubit in range(0, circ.num_qubits, 4):
+            cut, window_omitted, indices = window.cut(
+                layer, layer + 4, qubit, qubit + 4
+            )
+            omitted += window_omitted
+            assert len(cut.data) == len(indices)
+            for (instruction, qargs, _), idx in zip(cut.data, indices):
+                assert layer <= window.layers[idx] < layer + 4
+                assert all(qubit <= circ.find_bit(q).index < qubit + 4 for q in qargs)
+                if instruction.name != "barrier":
+                    assert instruction is circ.data[idx][0]
+                    shown.add(idx)
+
+    # every gate is shown in one window, or counted in each window it crosses
+    crossing = [
+        idx
+        for idx, (instruction, qargs, _) in enumerate(circ.data)
+        if instruction.name != "barrier"
+        and len({circ.find_bit(qarg).index // 4 for qarg in qargs}) > 1
+    ]
+    assert shown.isdisjoint(crossing)
+    assert len(shown) + len(crossing) == sum(
+        instruction.name != "barrier" for instruction, _, _ in circ.data
+    )
+    assert omitted >= len(crossing)
+
+
+def test_barriers_are_cut_down_and_crossing_gates_omitted():
+    circ = QuantumCircuit(4, 1)
+    circ.h(0)
+    circ.cx(1, 2)
+    circ.barrier()
+    circ.measure(3, 0)
+    window = CircuitWindow(circ)
+
+    cut, omitted, indices = window.cut(0, window.depth, 0, 2)
+    assert [instruction.name for instruction, _, _ in cut.data] == ["h", "barrier"]
+    assert cut.data[1][0].num_qubits == 2
+    assert omitted == 1
+    assert indices == [0, 2]
+    # the classical bits are kept, so conditions and measures stay valid
+    assert cut.num_clbits == 1
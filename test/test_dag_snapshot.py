@@ -0,0 +1,42 @@
+from qiskit import QuantumCircuit, pulse
+from qiskit.converters import circuit_to_dag
+
+from qiskit_trebugger.model import DAGSnapshotter
+
+
+def _schedule(duration):
+    with pulse.build() as schedule:
+        pulse.delay(duration, pulse.DriveChannel(0))
+    return schedule
+
+
+def _calibrated_dag():
+    circ = QuantumCircuit(2)
+    circ.h(0)
+    circ.h(1)
+    circ.add_calibration("h", [0], _schedule(16))
+    return circuit_to_dag(circ)
+
+
+def test_calibrations_are_copied():
+    dag = _calibrated_dag()
+    snapshot = DAGSnapshotter().capture(dag)
+
+    # a later pass adds a schedule for a gate which already has one
+    dag.add_calibration("h", [1], _schedule(32))
+    assert list(snapshot.calibrations["h"]) == [((0,), ())]
+
+    rebuilt = snapshot.to_dag()
+    rebuilt.add_calibration("h", [1], _schedule(32))
+    assert list(snapshot.to_dag().calibrations["h"]) == [((0,), ())]
+
+
+def test_fingerprint_covers_schedules():
+    dag = _calibrated_dag()
+    snapshotter = DAGSnapshotter()
+    before = snapshotter.capture(dag)
+    assert snapshotter.capture(dag).fingerprint == before.fingerprint
+
+    # same gate, qubits and params, another schedule
+    dag.add_calibration("h", [0], _schedule(32))
+    assert snapshotter.capture(dag).fingerprint != before.fingerprint
@@ -0,0 +1,187 @@
+import threading
+
+import pytest
+from qiskit import QuantumCircuit
+from qiskit.circuit.library import CXGate, HGate
+from qiskit.converters import circuit_to_dag, dag_to_circuit
+
+from qiskit_trebugger.model import (
+    CapturePolicy,
+    LogEntry,
+    SnapshotStore,
+    TranspilationSequence,
+    TranspilerDataCollector,
+)
+
+
+class FakePass:
+    """Documentation of the fake pass."""
+
+    def __init__(self, name, is_analysis):
+        self._name = name
+        self.is_analysis_pass = is_analysis
+        self.is_transformation_pass = not is_analysis
+
+    def name(self):
+        return self._name
+
+    def run(self, dag):
+        """Runs the fake pass."""
+
+
+def _run(collector, sequence, passes=12):
+    # alternates analysis and transformation passes over a small DAG, each
+    # pass writes a log entry and the analysis passes change the property set
+    dag = circuit_to_dag(QuantumCircuit(3))
+    property_set = {}
+    for idx in range(passes):
+        is_analysis = idx % 2 == 0
+        name = ("Analysis" if is_analysis else "Transformation") + str(idx % 4)
+        sequence.add_log_entry(name, LogEntry("INFO", "pass %d", (idx,)))
+        if is_analysis:
+            property_set["count"] = idx
+        elif idx % 4 == 1:
+            dag.apply_operation_back(HGate(), [dag.qubits[idx % 3]], [])
+        else:
+            dag.apply_operation_back(CXGate(), dag.qubits[:2], [])
+
+        collector.transpiler_callback(
+            pass_=FakePass(name, is_analysis),
+            dag=dag,
+            time=0.001,
+            property_set=property_set,
+            count=idx,
+        )
+
+
+def _collect(async_collection, snapshots=None, **kwargs):
+    notified = []
+    sequence = TranspilationSequence(notified.append, snapshots)
+    sequence.original_circuit = QuantumCircuit(3)
+    collector = TranspilerDataCollector(
+        sequence, async_collection=async_collection, **kwargs
+    )
+    _run(collector, sequence)
+    collector.close()
+    return sequence, notified
+
+
+def test_async_matches_sync():
+    sync_sequence, sync_notified = _collect(False)
+    async_sequence, async_notified = _collect(True, queue_size=2)
+
+    assert [step.index for step in async_notified] == list(range(12))
+    assert [step.index for step in sync_notified] == list(range(12))
+    for sync_step, async_step in zip(sync_sequence.steps, async_sequence.steps):
+        assert async_step.name == sync_step.name
+        assert async_step.type == sync_step.type
+        assert async_step.unchanged == sync_step.unchanged
+        assert async_step.circuit_stats == sync_step.circuit_stats
+        assert async_step.property_set_index == sync_step.property_set_index
+        assert [entry.args for entry in async_step.logs] == [
+            entry.args for entry in sync_step.logs
+        ]
+        assert dag_to_circuit(
+            async_sequence.get_dag(async_step.index)
+        ) == dag_to_circuit(sync_sequence.get_dag(sync_step.index))
+        assert {
+            name: prop.value
+            for name, prop in async_sequence.property_set(async_step.index).items()
+        } == {
+            name: prop.value
+            for name, prop in sync_sequence.property_set(sync_step.index).items()
+        }
+
+
+def test_full_queue_blocks_the_callback():
+    sequence = TranspilationSequence(lambda step: None)
+    sequence.original_circuit = QuantumCircuit(3)
+    collector = TranspilerDataCollector(sequence, async_collection=True, queue_size=1)
+
+    # the worker is held in the first pass, the second one fills the queue
+    release = threading.Event()
+    collect = collector._collect
+
+    def held_collect(*handle):
+        release.wait()
+        collect(*handle)
+
+    collector._collect = held_collect
+    transpiler = threading.Thread(target=_run, args=(collector, sequence, 3))
+    transpiler.start()
+    transpiler.join(0.3)
+    assert transpiler.is_alive()
+    assert len(sequence.steps) == 0
+
+    release.set()
+    transpiler.join(5)
+    assert not transpiler.is_alive()
+    collector.close()
+    assert len(sequence.steps) == 3
+    assert sequence.steps[2].overhead["queue"] > 0
+
+
+def test_worker_error_is_raised_by_close():
+    sequence = TranspilationSequence(lambda step: None)
+    sequence.original_circuit = QuantumCircuit(3)
+    collector = TranspilerDataCollector(sequence, async_collection=True, queue_size=1)
+
+    def failing_collect(*handle):
+        raise RuntimeError("collection failed")
+
+    collector._collect = failing_collect
+    # the worker keeps draining the queue, so the transpiler never blocks
+    _run(collector, sequence, 4)
+    with pytest.raises(RuntimeError, match="collection failed"):
+        collector.close()
+
+
+def _captured(sequence):
+    return [step.index for step in sequence.steps if step.index in sequence.snapshots]
+
+
+@pytest.mark.parametrize("async_collection", [False, True])
+def test_capture_policy(async_collection):
+    # transformation passes only, by default
+    sequence, _ = _collect(async_collection)
+    assert _captured(sequence) == [1, 3, 5, 7, 9, 11]
+
+    sequence, _ = _collect(async_collection, capture_policy=CapturePolicy(every_nth=2))
+    assert _captured(sequence) == [1, 5, 9]
+
+    policy = CapturePolicy(transformations_only=False, pass_names=["Analysis2"])
+    sequence, _ = _collect(async_collection, capture_policy=policy)
+    assert _captured(sequence) == [2, 6, 10]
+
+    # the circuit gets a gate on every transformation pass
+    sequence, _ = _collect(
+        async_collection, capture_policy=CapturePolicy(stats_only_above=3)
+    )
+    assert _captured(sequence) == [1, 3, 5]
+    sequence, _ = _collect(async_collection, capture_policy=CapturePolicy(max_depth=2))
+    assert _captured(sequence) == [1, 3, 5]
+
+    # all steps keep their stats
+    sizes = [step.circuit_stats.size for step in sequence.steps[::2]]
+    assert sizes == list(range(6))
+
+
+def test_first_pass_gets_stats():
+    # the first pass is an analysis pass, it is not kept but still captured
+    # for its stats, which the next analysis passes reuse
+    sequence, _ = _collect(False, capture_policy=CapturePolicy(pass_names=[]))
+    assert _captured(sequence) == []
+    assert sequence.steps[0].circuit_stats.width == 3
+    assert sequence.steps[0].circuit_stats.size == 0
+
+
+def test_memory_budget_keeps_the_stats():
+    policy = CapturePolicy(memory_budget=1)
+    sequence, _ = _collect(
+        False,
+        snapshots=SnapshotStore(memory_budget=policy.memory_budget),
+        capture_policy=policy,
+    )
+    assert _captured(sequence) == [11]
+    assert sequence.get_dag(1) is None
+    assert sequence.steps[1].circuit_stats.size == 1
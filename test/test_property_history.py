@@ -0,0 +1,78 @@
+import threading
+
+from qiskit_trebugger.model import PropertyHistory, PropertySnapshotter
+
+
+def _record_all(property_sets):
+    history = PropertyHistory()
+    snapshotter = PropertySnapshotter()
+    diffs = [
+        history.record(idx, snapshotter.capture(property_set))
+        for idx, property_set in enumerate(property_sets)
+    ]
+    return history, diffs
+
+
+def test_diffs_and_versions():
+    layout = {"a": 1}
+    property_sets = [{"layout": layout}]
+    layout = dict(layout, b=2)
+    property_sets += [{"layout": layout}, {"layout": layout, "depth": 3}, {"depth": 3}]
+    history, diffs = _record_all(property_sets)
+
+    assert diffs == [
+        {"layout": "new"},
+        {"layout": "updated"},
+        {"depth": "new"},
+        {"layout": "removed"},
+    ]
+    assert history.changed_steps == [0, 1, 2, 3]
+    assert history.value_at(0, "layout") == {"a": 1}
+    assert history.value_at(2, "layout") == {"a": 1, "b": 2}
+    assert history.property_at(3, "layout") is None
+    assert sorted(history.properties_at(2)) == ["depth", "layout"]
+
+
+def test_in_place_changes_are_copied():
+    layout = {"a": 1}
+    history = PropertyHistory()
+    snapshotter = PropertySnapshotter()
+    history.record(0, snapshotter.capture({"layout": layout}))
+
+    # a change of length is seen on the same object
+    layout["b"] = 2
+    assert history.record(1, snapshotter.capture({"layout": layout})) == {
+        "layout": "updated"
+    }
+    assert history.record(2, snapshotter.capture({"layout": layout})) == {}
+    assert history.value_at(0, "layout") == {"a": 1}
+    assert history.value_at(1, "layout") is not layout
+
+
+def test_in_place_changes_of_same_length_are_copied():
+    layout = {"a": 1, "b": 2}
+    history = PropertyHistory()
+    snapshotter = PropertySnapshotter()
+    history.record(0, snapshotter.capture({"layout": layout}))
+
+    layout["a"], layout["b"] = layout["b"], layout["a"]
+    assert history.record(1, snapshotter.capture({"layout": layout})) == {
+        "layout": "updated"
+    }
+    assert history.value_at(0, "layout") == {"a": 1, "b": 2}
+    assert history.value_at(1, "layout") == {"a": 2, "b": 1}
+
+
+def test_unchanged_values_reuse_their_capture():
+    snapshotter = PropertySnapshotter()
+    first = snapshotter.capture({"layout": {"a": 1}, "depth": 3})
+    second = snapshotter.capture({"layout": {"a": 1}, "depth": 3})
+    assert second["layout"] is first["layout"]
+
+
+def test_unpicklable_values_are_kept_live():
+    lock = threading.Lock()
+    history, diffs = _record_all([{"lock": lock}, {"lock": lock}])
+
+    assert diffs == [{"lock": "new"}, {}]
+    assert history.value_at(1, "lock") is lock
@@ -0,0 +1,26 @@
+from qiskit_trebugger.views.widget.render_cache import RenderCache
+
+
+def test_key_covers_parts_and_format(monkeypatch):
+    key = RenderCache.make_key("circuit", (0, 0), b"\x01")
+    assert key == RenderCache.make_key("circuit", (0, 0), b"\x01")
+    assert key != RenderCache.make_key("circuit", (0, 1), b"\x01")
+
+    # images stored by another format version are not served
+    monkeypatch.setattr(RenderCache, "FORMAT_VERSION", RenderCache.FORMAT_VERSION + 1)
+    assert key != RenderCache.make_key("circuit", (0, 0), b"\x01")
+
+
+def test_disk_cache_survives_the_memory(tmp_path):
+    key = RenderCache.make_key("circuit")
+    cache = RenderCache(maxsize=1, cache_dir=str(tmp_path))
+    cache.put(key, b"image")
+    cache.put(RenderCache.make_key("other"), b"other")
+
+    assert key not in cache.memory
+    assert cache.get(key) == b"image"
+    assert cache.disk_hits == 1
+
+    # a new cache on the same directory finds the image
+    assert RenderCache(cache_dir=str(tmp_path)).get(key) == b"image"
+    assert RenderCache().get(key) is None
@@ -0,0 +1,147 @@
+import pytest
+from qiskit import QuantumCircuit
+from qiskit.circuit.random import random_circuit
+from qiskit.converters import circuit_to_dag, dag_to_circuit
+
+from qiskit_trebugger.model import (
+    CompressedSnapshotStore,
+    DAGSnapshotter,
+    DiskSnapshotStore,
+    SerializedSnapshotStore,
+    SnapshotStore,
+)
+
+STORES = [
+    lambda: SnapshotStore(keyframe_interval=3),
+    lambda: CompressedSnapshotStore("zlib"),
+    lambda: CompressedSnapshotStore("lzma"),
+    lambda: DiskSnapshotStore(),
+]
+
+
+def _circuits():
+    # each circuit is the previous one with a few gates changed
+    circuits = []
+    circ = QuantumCircuit(3)
+    for step in range(8):
+        circ = circ.copy()
+        circ.h(step % 3)
+        circ.cx(step % 3, (step + 1) % 3)
+        if step % 2:
+            circ.data.pop(0)
+        circuits.append(circ)
+    return circuits
+
+
+def _fill(store, circuits):
+    snapshotter = DAGSnapshotter()
+    for idx, circ in enumerate(circuits):
+        store.add(idx, snapshotter.capture(circuit_to_dag(circ)))
+
+
+def test_round_trip_keyframes_only():
+    circuits = _circuits()
+    store = SnapshotStore()
+    _fill(store, circuits)
+
+    for idx, circ in enumerate(circuits):
+        assert dag_to_circuit(store.get(idx)) == circ
+
+
+def test_round_trip_deltas():
+    circuits = _circuits()
+    store = SnapshotStore(keyframe_interval=3)
+    _fill(store, circuits)
+
+    # out of order, so deltas are rebuilt from keyframes and cached steps
+    for idx in [5, 1, 7, 0, 4, 4, 2, 6, 3]:
+        assert dag_to_circuit(store.get(idx)) == circuits[idx]
+
+
+def test_repeated_snapshot_is_aliased():
+    circuits = _circuits()
+    store = SnapshotStore(keyframe_interval=2)
+    _fill(store, circuits[:3] + [circuits[2]])
+
+    assert len(store) == 3
+    assert 3 in store
+    assert store.fingerprint(3) == store.fingerprint(2)
+    assert dag_to_circuit(store.get(3)) == circuits[2]
+
+
+def test_discard_keyframe_keeps_its_delta():
+    circuits = _circuits()
+    store = SnapshotStore(keyframe_interval=4)
+    _fill(store, circuits)
+
+    store.discard(0)
+    assert 0 not in store
+    assert store.get(0) is None
+    for idx in range(1, len(circuits)):
+        assert dag_to_circuit(store.get(idx)) == circuits[idx]
+
+
+def test_memory_budget_keeps_newest():
+    circuits = _circuits()
+    store = SnapshotStore(memory_budget=1)
+    _fill(store, circuits)
+
+    assert len(store) == 1
+    assert dag_to_circuit(store.get(len(circuits) - 1)) == circuits[-1]
+    assert store.get(0) is None
+
+
+@pytest.mark.parametrize("store", STORES)
+def test_discard_drops_aliases(store):
+    circuits = _circuits()
+    store = store()
+    discarded = []
+    store.on_discard = discarded.append
+    _fill(store, circuits[:2] + [circuits[1], circuits[1]] + circuits[2:4])
+
+    store.discard(1)
+    assert discarded == [1, 2, 3]
+    assert [idx in store for idx in range(6)] == [True, False, False, False, True, True]
+    for idx, circ in [(0, circuits[0]), (4, circuits[2]), (5, circuits[3])]:
+        assert dag_to_circuit(store.get(idx)) == circ
+
+
+def test_serialized_store_is_abstract():
+    with pytest.raises(TypeError):
+        SerializedSnapshotStore()
+
+
+@pytest.mark.parametrize("store", STORES)
+def test_get_returns_independent_dags(store):
+    circuits = [random_circuit(4, 10, seed=seed) for seed in range(4)]
+    store = store()
+    _fill(store, circuits)
+
+    for idx, circ in enumerate(circuits):
+        dag = store.get(idx)
+        assert dag_to_circuit(dag) == circ
+
+        # modifying a returned DAG leaves the store untouched
+        dag.remove_op_node(next(dag.topological_op_nodes()))
+        assert dag_to_circuit(store.get(idx)) == circ
+
+
+def test_compressed_budget_drops_oldest():
+    circuits = [random_circuit(4, 10, seed=seed) for seed in range(4)]
+    store = CompressedSnapshotStore(memory_budget=1)
+    _fill(store, circuits)
+
+    assert len(store) == 1
+    assert store.get(0) is None
+    assert dag_to_circuit(store.get(3)) == circuits[3]
+
+
+def test_disk_budget_bounds_cache_only():
+    circuits = [random_circuit(4, 10, seed=seed) for seed in range(4)]
+    store = DiskSnapshotStore(memory_budget=1)
+    _fill(store, circuits)
+
+    for idx, circ in enumerate(circuits):
+        assert dag_to_circuit(store.get(idx)) == circ
+    assert len(store) == len(circuits)
+    assert len(store.cache) == 1
@@ -0,0 +1,28 @@
+import threading
+
+from qiskit_trebugger.views.widget.step_batcher import StepBatcher
+
+
+def test_batches_by_count_and_final_flush():
+    batches = []
+    batcher = StepBatcher(batches.append, max_steps=3, max_delay=60)
+    for step in range(7):
+        batcher.add(step)
+
+    assert batches == [[0, 1, 2], [3, 4, 5]]
+    assert len(batcher) == 1
+    batcher.flush()
+    assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_batches_by_delay_on_the_adding_thread():
+    threads = []
+    batcher = StepBatcher(
+        lambda steps: threads.append(threading.current_thread()),
+        max_steps=100,
+        max_delay=0,
+    )
+    batcher.add(0)
+    batcher.add(1)
+
+    assert threads == [threading.current_thread()] * 2
@@ -0,0 +1,96 @@
+from qiskit import QuantumCircuit
+from qiskit.converters import circuit_to_dag, dag_to_circuit
+
+from qiskit_trebugger.model import (
+    DAGSnapshotter,
+    PassType,
+    SnapshotStore,
+    TranspilationSequence,
+)
+from qiskit_trebugger.model.transpilation_step import TranspilationStep
+
+
+# pass types and whether the step is captured
+PASSES = [
+    (PassType.ANALYSIS, True),
+    (PassType.ANALYSIS, True),
+    (PassType.TRANSFORMATION, True),
+    (PassType.ANALYSIS, False),
+    (PassType.ANALYSIS, True),
+    (PassType.TRANSFORMATION, False),
+    (PassType.ANALYSIS, False),
+    (PassType.TRANSFORMATION, True),
+    (PassType.ANALYSIS, True),
+    (PassType.ANALYSIS, False),
+    (PassType.TRANSFORMATION, True),
+]
+
+
+def _sequence(snapshots):
+    circ = QuantumCircuit(3)
+    circ.h(0)
+    sequence = TranspilationSequence(lambda step: None, snapshots)
+    sequence.original_circuit = circ
+
+    snapshotter = DAGSnapshotter()
+    circuits = []
+    for idx, (pass_type, captured) in enumerate(PASSES):
+        if pass_type == PassType.TRANSFORMATION:
+            circ = circ.copy()
+            circ.cx(idx % 3, (idx + 1) % 3)
+        circuits.append(circ)
+
+        snapshot = snapshotter.capture(circuit_to_dag(circ)) if captured else None
+        sequence.add_step(TranspilationStep("pass" + str(idx), pass_type), snapshot)
+    return sequence, circuits
+
+
+def _walk_back(sequence, step_index):
+    # the step showing the circuit of step_index, looked up the slow way
+    idx = step_index
+    while (
+        idx >= 0
+        and idx not in sequence.snapshots
+        and sequence.steps[idx].type != PassType.TRANSFORMATION
+    ):
+        idx -= 1
+    return idx if idx >= 0 else None
+
+
+def _check(sequence, circuits):
+    for idx, circ in enumerate(circuits):
+        snapshot_index = sequence._snapshot_index(idx)
+        assert snapshot_index == _walk_back(sequence, idx)
+
+        dag = sequence.get_dag(idx)
+        if dag is not None:
+            assert dag_to_circuit(dag) == circ
+        else:
+            assert snapshot_index is not None
+            assert snapshot_index not in sequence.snapshots
+
+
+def test_lookup_is_forward_filled():
+    sequence, circuits = _sequence(SnapshotStore())
+    _check(sequence, circuits)
+
+    assert sequence._snapshot_index(3) == 2
+    assert sequence.get_dag(5) is None
+    assert sequence._snapshot_index(6) == 5
+
+
+def test_lookup_follows_discarded_snapshots():
+    sequence, circuits = _sequence(SnapshotStore())
+    for step_index in (0, 4, 8, 2):
+        sequence.snapshots.discard(step_index)
+        _check(sequence, circuits)
+
+    # the analysis steps before any transformation show the original circuit
+    assert sequence._snapshot_index(1) is None
+    assert dag_to_circuit(sequence.get_dag(1)) == sequence.original_circuit
+
+
+def test_lookup_with_memory_budget():
+    sequence, circuits = _sequence(SnapshotStore(memory_budget=1))
+    assert len(sequence.snapshots) == 1
+    _check(sequence, circuits)
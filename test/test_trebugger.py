@@ -114,9 +114,7 @@ class DebuggerTests(BaseCase):
         self.click(Downloads.circuit_img)
 
         for format in Downloads.formats:
-            element = Downloads.formats[format]
-            path = Downloads.base_path + element
-
-            self.click(path)
+            for path in Downloads.formats[format]:
+                self.click(path)
             # self.assert_downloaded_file(
             #     "circuit_diff_0"+format, timeout=2)